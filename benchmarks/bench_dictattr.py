@@ -0,0 +1,238 @@
+"""Benchmarks of ItemAttr, SequenceAttr, MappingAttr and DictModel.
+
+usage: PYTHONPATH=. python benchmarks/bench_dictattr.py [options]
+"""
+from __future__ import annotations
+
+import datetime
+import sys
+
+import data
+from harness import Run, benchmark, main
+
+from jashin.dictattr import DictModel, ItemAttr, MappingAttr, SequenceAttr
+
+
+class Address(DictModel):
+    city = ItemAttr[str]()
+    zip = ItemAttr[str]()
+
+
+class Item(DictModel):
+    sku = ItemAttr[str]()
+    quantity = ItemAttr[int]()
+    price = ItemAttr[float]()
+
+
+class Order(DictModel):
+    id = ItemAttr[int]()
+    ordered = ItemAttr(datetime.datetime.fromisoformat)
+    items = SequenceAttr(Item)
+
+
+class User(DictModel):
+    id = ItemAttr[int]()
+    name = ItemAttr[str]()
+    created = ItemAttr(datetime.datetime.fromisoformat)
+    address = ItemAttr(Address)
+    tags = SequenceAttr[str]()
+    orders = SequenceAttr(Order)
+    attrs = MappingAttr[str, int]()
+    scaled = MappingAttr[str, float](float)
+    city = ItemAttr[str](path="address.city")
+    first_price = ItemAttr[float](path="orders[0].items[0].price")
+
+
+def _user() -> User:
+    return User(data.user(0))
+
+
+@benchmark("dictattr.item.get", 500000)
+def item_get() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            user.name
+
+    return run
+
+
+@benchmark("dictattr.item.get_load", 100000)
+def item_get_load() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            user.created
+
+    return run
+
+
+@benchmark("dictattr.item.get_model", 200000)
+def item_get_model() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            user.address
+
+    return run
+
+
+@benchmark("dictattr.path.get_chain", 200000)
+def path_get_chain() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            user.orders[0].items[0].price
+
+    return run
+
+
+@benchmark("dictattr.path.get", 200000)
+def path_get() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            user.first_price
+
+    return run
+
+
+@benchmark("dictattr.path.set", 200000)
+def path_set() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            user.city = "Tokyo"
+
+    return run
+
+
+@benchmark("dictattr.item.set", 500000)
+def item_set() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            user.name = "name"
+
+    return run
+
+
+@benchmark("dictattr.item.set_dump", 200000)
+def item_set_dump() -> Run:
+    user = _user()
+    created = datetime.datetime(2020, 1, 1)
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            user.created = created
+
+    return run
+
+
+@benchmark("dictattr.sequence.iterate", 20000)
+def sequence_iterate() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            for _tag in user.tags:
+                pass
+
+    return run
+
+
+@benchmark("dictattr.sequence.iterate_load", 5000)
+def sequence_iterate_load() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            for _order in user.orders:
+                pass
+
+    return run
+
+
+@benchmark("dictattr.sequence.getitem", 200000)
+def sequence_getitem() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            user.orders[0]
+
+    return run
+
+
+@benchmark("dictattr.sequence.setitem", 200000)
+def sequence_setitem() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            user.tags[0] = "tag"
+
+    return run
+
+
+@benchmark("dictattr.mapping.iterate", 20000)
+def mapping_iterate() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            for _v in user.attrs.values():
+                pass
+
+    return run
+
+
+@benchmark("dictattr.mapping.iterate_load", 20000)
+def mapping_iterate_load() -> Run:
+    user = _user()
+    user.values["scaled"] = user.values["attrs"]
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            for _v in user.scaled.values():
+                pass
+
+    return run
+
+
+@benchmark("dictattr.mapping.setitem", 200000)
+def mapping_setitem() -> Run:
+    user = _user()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            user.attrs["key0"] = 0
+
+    return run
+
+
+@benchmark("dictattr.model.traverse", 100)
+def model_traverse() -> Run:
+    users = [User(d) for d in data.users(100)]
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            total = 0.0
+            for user in users:
+                user.address.city
+                for order in user.orders:
+                    for item in order.items:
+                        total += item.price * item.quantity
+
+    return run
+
+
+if __name__ == "__main__":
+    sys.exit(main())
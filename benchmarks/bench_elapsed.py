@@ -0,0 +1,101 @@
+"""Measure overhead of Elapsed sections.
+
+usage: PYTHONPATH=. python benchmarks/bench_elapsed.py [options]
+"""
+from __future__ import annotations
+
+import sys
+
+from harness import Run, benchmark, main
+
+from jashin.elapsed import Elapsed
+
+
+def _with(e: Elapsed) -> Run:
+    def run(n: int) -> None:
+        for _ in range(n):
+            with e("with"):
+                pass
+
+    return run
+
+
+def _begin_end(e: Elapsed) -> Run:
+    def run(n: int) -> None:
+        for _ in range(n):
+            e.begin("begin_end")
+            e.end()
+
+    return run
+
+
+@benchmark("elapsed.with", 200000)
+def with_block() -> Run:
+    return _with(Elapsed())
+
+
+@benchmark("elapsed.with_nested", 200000)
+def with_nested() -> Run:
+    e = Elapsed()
+
+    def run(n: int) -> None:
+        with e("outer"):
+            for _ in range(n):
+                with e("inner"):
+                    pass
+
+    return run
+
+
+@benchmark("elapsed.with_slow", 200000)
+def with_slow() -> Run:
+    # Threshold is checked, but no section is slow.
+    return _with(Elapsed(slow=10))
+
+
+@benchmark("elapsed.with_profile_other", 200000)
+def with_profile_other() -> Run:
+    # Another section is profiled.
+    e = Elapsed()
+    e.profile("other")
+    return _with(e)
+
+
+@benchmark("elapsed.with_sampled", 200000)
+def with_sampled() -> Run:
+    return _with(Elapsed(sample=100))
+
+
+@benchmark("elapsed.with_disabled", 1000000)
+def with_disabled() -> Run:
+    return _with(Elapsed(enabled=False))
+
+
+@benchmark("elapsed.begin_end", 200000)
+def begin_end() -> Run:
+    return _begin_end(Elapsed())
+
+
+@benchmark("elapsed.begin_end_disabled", 1000000)
+def begin_end_disabled() -> Run:
+    return _begin_end(Elapsed(enabled=False))
+
+
+@benchmark("elapsed.decorator", 200000)
+def decorator() -> Run:
+    # Includes the cost of calling the function.
+    e = Elapsed()
+
+    @e("decorator")
+    def noop() -> None:
+        pass
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            noop()
+
+    return run
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Benchmarks of JSON serialization with jsondefault.
+
+usage: PYTHONPATH=. python benchmarks/bench_jsondefault.py [options]
+"""
+from __future__ import annotations
+
+import datetime
+import json
+import sys
+from typing import List, Set
+
+import data
+from harness import Run, benchmark, main
+
+from jashin import jsondefault
+from jashin.dictattr import DictModel, ItemAttr, SequenceAttr
+
+
+class Event(DictModel):
+    at = ItemAttr[datetime.datetime]()
+    day = ItemAttr[datetime.date]()
+
+
+class Record(DictModel):
+    id = ItemAttr[int]()
+    name = ItemAttr[str]()
+    score = ItemAttr[float]()
+    created = ItemAttr[datetime.datetime]()
+    birthday = ItemAttr[datetime.date]()
+    token = ItemAttr[bytes]()
+    groups = ItemAttr[Set[int]]()
+    events = SequenceAttr(Event)
+
+
+def _models(n: int) -> List[Record]:
+    records = data.mixed(n, views=False)
+    for r in records:
+        r["events"] = [{"at": r["created"], "day": r["birthday"]} for _ in range(5)]
+    return [Record(r) for r in records]
+
+
+@benchmark("jsondefault.common.mixed", 50)
+def common_mixed() -> Run:
+    records = data.mixed(1000)
+    default = jsondefault.common()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            json.dumps(records, default=default)
+
+    return run
+
+
+@benchmark("jsondefault.tagged.mixed", 50)
+def tagged_mixed() -> Run:
+    records = data.mixed(1000)
+    default = jsondefault.tagged()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            json.dumps(records, default=default)
+
+    return run
+
+
+@benchmark("jsondefault.common.plain", 50)
+def common_plain() -> Run:
+    # Nested records without values which need the converter.
+    records = data.users(20)
+    default = jsondefault.common()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            json.dumps(records, default=default)
+
+    return run
+
+
+@benchmark("jsondefault.model.default", 20)
+def model_default() -> Run:
+    models = _models(1000)
+    default = jsondefault.common()
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            json.dumps([m.values for m in models], default=default)
+
+    return run
+
+
+@benchmark("jsondefault.model.serializer", 20)
+def model_serializer() -> Run:
+    models = _models(1000)
+    default = jsondefault.common()
+    serialize = jsondefault.model_serializer(Record, default)
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            json.dumps([serialize(m) for m in models], default=default)
+
+    return run
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Compare jsonpool.dumps() with json.dumps() on a large list of records.
+
+usage: PYTHONPATH=. python benchmarks/bench_jsonpool.py [options]
+
+``jsonpool.dumps`` uses a process for each CPU. Compare it with ``jsonpool.json``
+to see the speedup.
+"""
+from __future__ import annotations
+
+import atexit
+import concurrent.futures
+import json
+import sys
+
+import data
+from harness import Run, benchmark, main
+
+from jashin import jsondefault, jsonpool
+
+RECORDS = 50000
+CHUNKSIZE = 5000
+
+
+@benchmark("jsonpool.json", 1)
+def json_dumps() -> Run:
+    records = data.mixed(RECORDS, views=False)
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            json.dumps(records, default=jsondefault.common()).encode()
+
+    return run
+
+
+@benchmark("jsonpool.dumps", 1)
+def pool_dumps() -> Run:
+    records = data.mixed(RECORDS, views=False)
+    executor = concurrent.futures.ProcessPoolExecutor()
+    atexit.register(executor.shutdown)
+
+    # warm up worker processes
+    jsonpool.dumps(records, jsondefault.common, executor=executor)
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            jsonpool.dumps(
+                records, jsondefault.common, chunksize=CHUNKSIZE, executor=executor
+            )
+
+    return run
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Benchmarks of pickling DictModel for other processes.
+
+usage: PYTHONPATH=. python benchmarks/bench_pickle.py [options]
+"""
+from __future__ import annotations
+
+import pickle
+import sys
+
+from harness import Run, benchmark, main
+
+from jashin.dictattr import DictModel, ItemAttr
+
+
+class Blob(DictModel):
+    BUFFER_THRESHOLD = 65536
+
+    id = ItemAttr[int]()
+    payload = ItemAttr[bytes]()
+
+
+@benchmark("pickle.pickle_buffer", 200)
+def pickle_buffer() -> Run:
+    # 10 models with 1MB payload, sent out-of-band.
+    blobs = [Blob({"id": i, "payload": bytes(1 << 20)}) for i in range(10)]
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            buffers: list[pickle.PickleBuffer] = []
+            s = pickle.dumps(blobs, protocol=5, buffer_callback=buffers.append)
+            pickle.loads(s, buffers=buffers)
+
+    return run
+
+
+@benchmark("pickle.pickle5_large", 20)
+def pickle5_large() -> Run:
+    # Large model without buffers, pickled with protocol 5.
+    rows = [{"id": i, "name": str(i), "tags": ["a", "b"]} for i in range(20000)]
+    model = DictModel({"rows": rows})
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            pickle.dumps(model, protocol=5)
+
+    return run
+
+
+@benchmark("pickle.pickle_inband", 200)
+def pickle_inband() -> Run:
+    blobs = [Blob({"id": i, "payload": bytes(1 << 20)}) for i in range(10)]
+
+    def run(n: int) -> None:
+        for _ in range(n):
+            pickle.loads(pickle.dumps(blobs, protocol=5))
+
+    return run
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Generators of realistic data for benchmarks.
+
+The shape follows typical JSON API responses: a user with a nested address,
+a list of orders each containing a list of items, and free-form attributes.
+All generators are deterministic for the same arguments.
+"""
+from __future__ import annotations
+
+import datetime
+import random
+from typing import Any, Dict, List
+
+_BASE = datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+_CITIES = ["Tokyo", "Osaka", "Nagoya", "Sapporo", "Fukuoka", "Kobe", "Kyoto"]
+_TAGS = ["new", "vip", "beta", "staff", "trial", "blocked", "partner", "legacy"]
+
+
+def _timestamp(rnd: random.Random) -> datetime.datetime:
+    return _BASE + datetime.timedelta(seconds=rnd.randrange(10**8))
+
+
+def item(rnd: random.Random) -> Dict[str, Any]:
+    return {
+        "sku": f"SKU-{rnd.randrange(10**6):06d}",
+        "quantity": rnd.randrange(1, 10),
+        "price": round(rnd.uniform(1, 500), 2),
+    }
+
+
+def order(rnd: random.Random, nitems: int = 5) -> Dict[str, Any]:
+    return {
+        "id": rnd.randrange(10**9),
+        "ordered": _timestamp(rnd).isoformat(),
+        "items": [item(rnd) for _ in range(nitems)],
+    }
+
+
+def user(i: int, norders: int = 10, nitems: int = 5) -> Dict[str, Any]:
+    """A JSON object of a user, as decoded by ``json.loads()``."""
+
+    rnd = random.Random(i)
+    return {
+        "id": i,
+        "name": f"user{i}",
+        "email": f"user{i}@example.com",
+        "created": _timestamp(rnd).isoformat(),
+        "score": rnd.random(),
+        "address": {
+            "city": rnd.choice(_CITIES),
+            "zip": f"{rnd.randrange(10**7):07d}",
+        },
+        "tags": rnd.sample(_TAGS, 3),
+        "orders": [order(rnd, nitems) for _ in range(norders)],
+        "attrs": {f"key{k}": rnd.randrange(1000) for k in range(10)},
+    }
+
+
+def users(n: int, norders: int = 10, nitems: int = 5) -> List[Dict[str, Any]]:
+    return [user(i, norders, nitems) for i in range(n)]
+
+
+def mixed(n: int, views: bool = True) -> List[Dict[str, Any]]:
+    """Records with values which need ``default`` of ``json.dumps()``.
+
+    Dictionary views are not picklable, so pass ``views=False`` to send the
+    records to other processes.
+    """
+
+    rnd = random.Random(0)
+    records = [
+        {
+            "id": i,
+            "name": f"user{i}",
+            "score": rnd.random(),
+            "created": _timestamp(rnd),
+            "birthday": datetime.date(1950 + i % 50, 1 + i % 12, 1 + i % 28),
+            "token": rnd.getrandbits(128).to_bytes(16, "little"),
+            "groups": {rnd.randrange(100) for _ in range(3)},
+        }
+        for i in range(n)
+    ]
+    if views:
+        for r in records:
+            r["keys"] = {"a": 1, "b": 2}.keys()
+    return records
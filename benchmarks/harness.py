@@ -0,0 +1,181 @@
+"""Minimal benchmark harness shared by benchmarks/bench_*.py.
+
+A benchmark is a function which prepares data and returns a function to be
+measured. The returned function is called with the number of iterations to run::
+
+    @benchmark("dictattr.item.get")
+    def item_get() -> Run:
+        obj = User(data.user(0))
+
+        def run(n: int) -> None:
+            for _ in range(n):
+                obj.name
+
+        return run
+
+Time of an empty loop of the same length is subtracted from the result, so the
+results are nanoseconds per iteration of the body.
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import platform
+import sys
+import time
+from typing import IO, Any, Callable, Dict, List, NamedTuple, Optional
+
+import jashin
+
+Run = Callable[[int], None]
+Setup = Callable[[], Run]
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Setup
+    number: int
+
+
+_registry: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, number: int = 100000) -> Callable[[Setup], Setup]:
+    """Register a benchmark.
+
+    :param name: Dotted name of the benchmark, e.g. ``"dictattr.item.get"``.
+    :param number: Number of iterations in a measurement.
+    """
+
+    def deco(setup: Setup) -> Setup:
+        if name in _registry:
+            raise ValueError(f"Duplicate benchmark: {name}")
+        _registry[name] = Benchmark(name, setup, number)
+        return setup
+
+    return deco
+
+
+def _empty(n: int) -> None:
+    for _ in range(n):
+        pass
+
+
+def _best(f: Run, n: int, repeat: int) -> int:
+    best = sys.maxsize
+    for _ in range(repeat):
+        t = time.perf_counter_ns()
+        f(n)
+        best = min(best, time.perf_counter_ns() - t)
+    return best
+
+
+def measure(bench: Benchmark, repeat: int = 5, scale: float = 1.0) -> Dict[str, Any]:
+    """Run a benchmark and return the result as a JSON-able dict."""
+
+    f = bench.setup()
+    n = max(1, int(bench.number * scale))
+    f(min(n, 100))  # warm up
+
+    t = _best(f, n, repeat)
+    loop = _best(_empty, n, repeat)
+    return {"ns": max(0.0, (t - loop) / n), "number": n, "repeat": repeat}
+
+
+def run(
+    patterns: Optional[List[str]] = None, repeat: int = 5, scale: float = 1.0
+) -> Dict[str, Any]:
+    """Run registered benchmarks matching any of glob ``patterns``."""
+
+    results: Dict[str, Any] = {}
+    for name in sorted(_registry):
+        if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+            continue
+        results[name] = r = measure(_registry[name], repeat, scale)
+        print(f"{name:<48} {r['ns']:12.1f} ns", file=sys.stderr)
+
+    return {
+        "jashin": jashin.__version__,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.1,
+    out: IO[str] = sys.stdout,
+) -> List[str]:
+    """Print ratio of ``current`` to ``baseline`` and return names of regressions.
+
+    A benchmark is regarded as regressed if it is slower than the baseline by
+    more than ``threshold`` (e.g. 0.1 for 10%).
+    """
+
+    base = baseline["results"]
+    regressions = []
+    print(f"{'name':<48} {'baseline':>12} {'current':>12} {'ratio':>7}", file=out)
+    for name, r in current["results"].items():
+        if name not in base:
+            print(f"{name:<48} {'-':>12} {r['ns']:12.1f} {'new':>7}", file=out)
+            continue
+
+        b = base[name]["ns"]
+        ratio = r["ns"] / b if b else 1.0
+        mark = ""
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            mark = " !"
+        print(f"{name:<48} {b:12.1f} {r['ns']:12.1f} {ratio:7.2f}{mark}", file=out)
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run jashin benchmarks.")
+    parser.add_argument(
+        "-k", dest="patterns", action="append", help="glob pattern of benchmark names"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="number of repetitions")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiplier of the iterations"
+    )
+    parser.add_argument("-o", "--output", help="write results to JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="baseline JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="tolerated slowdown against the baseline (default: 0.1)",
+    )
+    parser.add_argument("--list", action="store_true", help="list benchmarks")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name in sorted(_registry):
+            print(name)
+        return 0
+
+    current = run(args.patterns, args.repeat, args.scale)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+            f.write("\n")
+    elif not args.compare:
+        json.dump(current, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+
+    return 0
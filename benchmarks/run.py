@@ -0,0 +1,22 @@
+"""Run all benchmarks of jashin.
+
+usage: PYTHONPATH=. python benchmarks/run.py [-k PATTERN] [-o RESULT.json]
+                                             [--compare BASELINE.json]
+
+Save a baseline with ``-o baseline.json`` and check a later build with
+``--compare baseline.json``. Exits with status 1 if any benchmark is slower
+than the baseline by more than ``--threshold``.
+"""
+from __future__ import annotations
+
+import sys
+
+import bench_dictattr  # noqa: F401
+import bench_elapsed  # noqa: F401
+import bench_jsondefault  # noqa: F401
+import bench_jsonpool  # noqa: F401
+import bench_pickle  # noqa: F401
+from harness import main
+
+if __name__ == "__main__":
+    sys.exit(main())
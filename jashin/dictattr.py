@@ -1,6 +1,11 @@
 from __future__ import annotations
 
+import pickle
+import re
+import threading
+import time
 from typing import (
+    TYPE_CHECKING,
     Any,
     Callable,
     Dict,
@@ -21,17 +26,143 @@ from typing import (
 
 from .omit import OMIT
 
-__all__ = ("ItemAttr", "MappingAttr", "SequenceAttr", "DictModel")
+if TYPE_CHECKING:
+    from .elapsed import Elapsed
+
+__all__ = (
+    "ItemAttr",
+    "MappingAttr",
+    "SequenceAttr",
+    "DictModel",
+    "fields",
+    "set_instrument",
+    "elapsed_sink",
+)
 
 
 F = TypeVar("F")
 Loader = Callable[[Any], F]
 Dumper = Callable[[F], Any]
 
+# Receives (event, class name, field name, nanoseconds)
+Sink = Callable[[str, str, str, int], None]
+
+_sink: Optional[Sink] = None
+
+# Number of instrumented "get" and "set" running in the thread.
+_access = threading.local()
+
+
+def set_instrument(sink: Optional[Sink]) -> Optional[Sink]:
+    """Start or stop instrumentation of ItemAttr, SequenceAttr and MappingAttr.
+
+    :param sink: Function to receive events. ``None`` to stop instrumentation.
+
+    While instrumented, ``sink`` is called with four arguments, name of the event,
+    qualified name of the class, name of the field and elapsed time in
+    nanoseconds. Events are:
+
+    - ``"get"``: Read access on the attribute.
+    - ``"set"``: Write access on the attribute.
+    - ``"load"``: Call of ``load`` function.
+    - ``"dump"``: Call of ``dump`` function.
+    - ``"view"``: Allocation of a sequence or mapping object by SequenceAttr or
+      MappingAttr. Elapsed time is always 0.
+
+    Time of ``"get"`` and ``"set"`` includes ``"load"`` and ``"dump"`` in them.
+    Without instrumentation, attribute access costs only a check of a global
+    variable. Returns the previous sink.
+
+    ex::
+        counter = collections.Counter()
+
+        def sink(event, cls, field, ns):
+            counter[cls, field, event] += 1
+
+        set_instrument(sink)
+    """
+
+    global _sink
+    prev = _sink
+    _sink = sink
+    return prev
+
+
+def elapsed_sink(elapsed: Elapsed) -> Sink:
+    """Returns a sink for :func:`set_instrument` to record events to ``elapsed``.
+
+    Events are recorded as sections named ``<class>.<field>:<event>``. ``"get"``
+    and ``"set"`` are recorded as children of the running section of
+    ``elapsed``, and ``"load"``, ``"dump"`` and ``"view"`` as children of the
+    ``"get"`` or ``"set"`` which contains them, so that their time is not
+    counted twice. Access to attributes from ``load`` or ``dump`` functions is
+    included in their time and is not recorded.
+    """
+
+    record = elapsed.record
+    local = threading.local()
+
+    def sink(event: str, cls: str, field: str, ns: int) -> None:
+        access = event == "get" or event == "set"
+        depth = getattr(_access, "depth", 0)
+        if depth > 1 or (depth and access):
+            # Called from "load" or "dump" of another attribute.
+            return
+
+        name = f"{cls}.{field}:{event}"
+        pending = getattr(local, "pending", None)
+        if depth:
+            # Called in "get" or "set", which is sent after it.
+            if pending is None:
+                pending = local.pending = []
+            pending.append((name, ns))
+        elif access and pending:
+            local.pending = None
+            record(name, ns, pending)
+        else:
+            record(name, ns)
+
+    return sink
+
+
+_PATH_SEGMENT = re.compile(r"([^.\[\]]+)((?:\[-?\d+\])*)")
+_PATH_INDEX = re.compile(r"-?\d+")
+
+Key = Union[str, int]
+
+
+def _compile_path(path: str) -> Tuple[Key, ...]:
+    """Split path like ``"a.b[0].c"`` into keys ``("a", "b", 0, "c")``."""
+
+    keys: List[Key] = []
+    for segment in path.split("."):
+        m = _PATH_SEGMENT.fullmatch(segment)
+        if not m:
+            raise ValueError(f"Invalid path: {path!r}")
+        keys.append(m[1])
+        keys.extend(int(i) for i in _PATH_INDEX.findall(m[2]))
+    return tuple(keys)
+
+
+def _walk(data: Any, keys: Tuple[Key, ...]) -> Any:
+    """Returns the item at ``keys`` in nested dictionaries and lists, or ``OMIT``
+    if not found. Indexes are applied only to lists."""
+
+    try:
+        for key in keys:
+            if isinstance(key, int) and not isinstance(data, list):
+                return OMIT
+            data = data[key]
+    except (KeyError, IndexError, TypeError):
+        return OMIT
+    return data
+
 
 class ItemAttrBase(Generic[F]):
     funcs: Tuple[Optional[Loader[F]], Optional[Dumper[F]]]
     name: Optional[str]
+    path: Optional[str]
+    keys: Optional[Tuple[Key, ...]]
     DICT_METHOD: str = "__dictattr_get__"
 
     def __init__(
@@ -41,12 +172,18 @@ class ItemAttrBase(Generic[F]):
         *,
         name: Optional[str] = None,
         default: Any = OMIT,
+        path: Optional[str] = None,
     ):
 
+        if name is not None and path is not None:
+            raise ValueError("name and path are exclusive")
+
         # save loader/dumper as tuple to prevent descr functionary
         self.funcs = (load, dump)
         self.name = name
         self.default = default
+        self.path = path
+        self.keys = _compile_path(path) if path is not None else None
 
     def __set_name__(self, owner: Any, name: str) -> None:
         if self.name is None:
@@ -67,6 +204,15 @@ class ItemAttrBase(Generic[F]):
 
         data = self._get_dict(instance)
 
+        keys = self.keys
+        if keys is not None:
+            value = _walk(data, keys)
+            if value is OMIT:
+                if self.default is not OMIT:
+                    return None, cast(F, self.default)
+                raise ValueError(f"{self.path} is not found")
+            return self.funcs[0], value
+
         if self.name not in data:
             if self.default is not OMIT:
                 return None, cast(F, self.default)
@@ -74,6 +220,32 @@ class ItemAttrBase(Generic[F]):
 
         return self.funcs[0], data[self.name]
 
+    def _get_container(self, instance: Any) -> Tuple[Any, Key]:
+        """Returns the container of the value and the key in the container.
+
+        Missing dictionaries in the ``path`` are created."""
+
+        data: Any = self._get_dict(instance)
+
+        keys = self.keys
+        if keys is None:
+            assert self.name, "Field name is not provided"
+            return data, self.name
+
+        for i in range(len(keys) - 1):
+            key = keys[i]
+            if isinstance(key, int) and not isinstance(data, list):
+                raise ValueError(f"{self.path} is not found")
+            try:
+                data = data[key]
+            except KeyError:
+                if isinstance(keys[i + 1], int):
+                    raise ValueError(f"{self.path} is not found") from None
+                data[key] = data = {}
+            except (IndexError, TypeError):
+                raise ValueError(f"{self.path} is not found") from None
+        return data, keys[-1]
+
     def _dump_value(self, value: Any) -> Any:
         dumper = self.funcs[1]
         if dumper:
@@ -85,17 +257,102 @@ class ItemAttrBase(Generic[F]):
 
         return value
 
+    def _timed(self, event: str, func: Callable[[Any], Any], clsname: str) -> Any:
+        sink = _sink
+        assert sink
+        name = self.name or ""
+
+        def timed(value: Any) -> Any:
+            t = time.perf_counter_ns()
+            try:
+                return func(value)
+            finally:
+                sink(event, clsname, name, time.perf_counter_ns() - t)
+
+        return timed
+
+    def _timed_funcs(
+        self, clsname: str
+    ) -> Tuple[Optional[Loader[F]], Optional[Dumper[F]]]:
+        load, dump = self.funcs
+        return (
+            self._timed("load", load, clsname) if load else None,
+            self._timed("dump", dump, clsname) if dump else None,
+        )
+
+    def _dump_values(self, value: Any, dump: Callable[[Any], Any]) -> Any:
+        return dump(value)
+
+    def _get_instrumented(self, instance: Any, owner: type) -> Any:
+        sink = _sink
+        assert sink
+        clsname = instance.__class__.__qualname__
+        depth = getattr(_access, "depth", 0)
+        _access.depth = depth + 1
+        t = time.perf_counter_ns()
+        try:
+            return self._get_with(self._timed_funcs(clsname), instance, owner)
+        finally:
+            ns = time.perf_counter_ns() - t
+            _access.depth = depth
+            sink("get", clsname, self.name or "", ns)
+
+    def _get_with(
+        self,
+        funcs: Tuple[Optional[Loader[F]], Optional[Dumper[F]]],
+        instance: Any,
+        owner: type,
+    ) -> Any:
+        """Read the attribute with ``funcs`` instead of ``self.funcs``."""
+
+        loader, value = self._get_value(instance, owner)
+        loader = funcs[0] if loader else None
+        if not loader:
+            return value
+
+        return loader(value)
+
+    def _set_instrumented(self, instance: Any, value: Any) -> None:
+        sink = _sink
+        assert sink
+        clsname = instance.__class__.__qualname__
+        depth = getattr(_access, "depth", 0)
+        _access.depth = depth + 1
+        t = time.perf_counter_ns()
+        try:
+            data, key = self._get_container(instance)
+            dump = self._dump_value
+            if self.funcs[1]:
+                dump = self._timed("dump", dump, clsname)
+            data[key] = self._dump_values(value, dump)
+        finally:
+            ns = time.perf_counter_ns() - t
+            _access.depth = depth
+            sink("set", clsname, self.name or "", ns)
+
     def _set(self, instance: Any, value: Any) -> None:
-        assert self.name, "Field name is not provided"
-        data = self._get_dict(instance)
+        data, key = self._get_container(instance)
 
         value = self._dump_value(value)
-        data[self.name] = value
+        data[key] = value
 
     def __delete__(self, instance: Any) -> None:
-        data = self._get_dict(instance)
-        assert self.name, "Field name is not provided"
-        del data[self.name]
+        data: Any = self._get_dict(instance)
+
+        keys = self.keys
+        if keys is None:
+            del data[self.name]
+            return
+
+        # Unlike assignment, missing dictionaries are not created.
+        data = _walk(data, keys[:-1])
+        key = keys[-1]
+        if data is OMIT or (isinstance(key, int) and not isinstance(data, list)):
+            raise KeyError(self.path)
+        try:
+            del data[key]
+        except (KeyError, IndexError, TypeError):
+            raise KeyError(self.path) from None
 
 
 class ItemAttr(ItemAttrBase[F]):
@@ -105,6 +362,7 @@ class ItemAttr(ItemAttrBase[F]):
     :param dump: Convert assigned value to store to the source dictionary item.
     :param name: key in the source dictionary item. Default to attr name in class.
     :param default: Default value is the item is not exit in the source dictionary.
+    :param path: Path to the item in nested dictionaries.
 
     ItemAttr get value from the dictionary obtained from self.__dictattr_get__()
     method of the class. The key to retrieve value from the dictionary is the name
@@ -120,21 +378,35 @@ class ItemAttr(ItemAttrBase[F]):
 
     ``default`` is the value used if the key is not exist on the source dictionary.
 
+    ``path`` specifies the item in nested dictionaries and lists instead of
+    ``name``, such as ``"user.addresses[0].city"``. Keys are separated by ``.``,
+    and indexes of lists are enclosed in ``[]``. The path is parsed once on the
+    definition, and the item is accessed with a lookup per key without
+    creating objects for the intermediate dictionaries. ``default`` is used if any
+    key or index in the path is missing. On assignment, missing intermediate
+    dictionaries are created.
+
+    ::
+
+        class Order(DictModel):
+            city = ItemAttr[str](path="customer.addresses[0].city")
     """
 
     def __get__(self, instance: Any, owner: type) -> F:
-        loader, value = self._get_value(instance, owner)
-        if not loader:
-            return cast(F, value)
+        if _sink is not None:
+            return cast(F, self._get_instrumented(instance, owner))
 
-        return loader(value)
+        return cast(F, self._get_with(self.funcs, instance, owner))
 
     def __set__(self, instance: Any, value: F) -> None:
-        assert self.name, "Field name is not provided"
-        data = self._get_dict(instance)
+        if _sink is not None:
+            self._set_instrumented(instance, value)
+            return
+
+        data, key = self._get_container(instance)
 
         value = self._dump_value(value)
-        data[self.name] = value
+        data[key] = value
 
 
 _T = TypeVar("_T")
@@ -244,23 +516,41 @@ class SequenceAttr(ItemAttrBase[F]):
     :param dump: Convert assigned value to store to the source dictionary item.
     :param name: key in the source dictionary item. Default to attr name in class.
     :param default: Default value is the item is not exit in the source dictionary.
+    :param path: Path to the item in nested dictionaries. See :class:`ItemAttr`.
 
     Each elements in the sequence is converted by ``load``/``dump`` function on
     reading/writing the value.
     """
 
     def __get__(self, instance: Any, owner: type) -> MutableSequence[F]:
+        if _sink is not None:
+            return cast(MutableSequence[F], self._get_instrumented(instance, owner))
+
+        return cast(MutableSequence[F], self._get_with(self.funcs, instance, owner))
+
+    def _get_with(
+        self,
+        funcs: Tuple[Optional[Loader[F]], Optional[Dumper[F]]],
+        instance: Any,
+        owner: type,
+    ) -> Any:
         _, value = self._get_value(instance, owner)
+        if _sink:
+            _sink("view", instance.__class__.__qualname__, self.name or "", 0)
+        return _SeqAttr[F](funcs, value, self.DICT_METHOD)
 
-        return _SeqAttr[F](self.funcs, value, self.DICT_METHOD)
+    def _dump_values(self, value: Any, dump: Callable[[Any], Any]) -> Any:
+        return [dump(v) for v in value]
 
     def __set__(self, instance: Any, value: Sequence[F]) -> None:
+        if _sink is not None:
+            self._set_instrumented(instance, value)
+            return
 
-        assert self.name, "Field name is not provided"
-        data = self._get_dict(instance)
+        data, key = self._get_container(instance)
 
         values = [self._dump_value(v) for v in value]
-        data[self.name] = values
+        data[key] = values
 
 
 _K = TypeVar("_K")
@@ -329,6 +619,7 @@ class MappingAttr(Generic[K, V], ItemAttrBase[V]):
     :param dump: Convert assigned value to store to the source dictionary item.
     :param name: key in the source dictionary item. Default to attr name in class.
     :param default: Default value is the item is not exit in the source dictionary.
+    :param path: Path to the item in nested dictionaries. See :class:`ItemAttr`.
 
     Each item value in the mapping is converted by ``load``/``dump`` function on
     reading/writing the value.
@@ -343,16 +634,34 @@ class MappingAttr(Generic[K, V], ItemAttrBase[V]):
     """
 
     def __get__(self, instance: Any, owner: type) -> MutableMapping[K, V]:
+        if _sink is not None:
+            return cast(MutableMapping[K, V], self._get_instrumented(instance, owner))
+
+        return cast(MutableMapping[K, V], self._get_with(self.funcs, instance, owner))
+
+    def _get_with(
+        self,
+        funcs: Tuple[Optional[Loader[V]], Optional[Dumper[V]]],
+        instance: Any,
+        owner: type,
+    ) -> Any:
         _, value = self._get_value(instance, owner)
+        if _sink:
+            _sink("view", instance.__class__.__qualname__, self.name or "", 0)
+        return _MappingAttr[K, V](funcs, value, self.DICT_METHOD)
 
-        return _MappingAttr[K, V](self.funcs, value, self.DICT_METHOD)
+    def _dump_values(self, value: Any, dump: Callable[[Any], Any]) -> Any:
+        return {k: dump(v) for k, v in value.items()}
 
     def __set__(self, instance: Any, value: MutableMapping[K, V]) -> None:
-        assert self.name, "Field name is not provided"
-        data = self._get_dict(instance)
+        if _sink is not None:
+            self._set_instrumented(instance, value)
+            return
+
+        data, key = self._get_container(instance)
 
         values = {k: self._dump_value(v) for k, v in value.items()}
-        data[self.name] = values
+        data[key] = values
 
 
 class DictModel:
@@ -363,9 +672,17 @@ class DictModel:
     DictModel class is not mandatory to use ItemAttr, but is provied to avoid boilerplate code.
     ItemAttr works any classes with ``__dictattr_get__()`` method.
 
-
+    If ``BUFFER_THRESHOLD`` is set in a subclass, ``bytes`` and ``bytearray`` in
+    ``values`` not smaller than ``BUFFER_THRESHOLD`` are pickled as out-of-band
+    buffers with pickle protocol 5, so they are not copied if ``buffer_callback``
+    is given to the pickler. Buffers passed to ``pickle.loads()`` are restored as
+    ``memoryview`` objects, which are pickled again in the same way, or as
+    ``bytes`` with protocols older than 5. This is disabled by default, since
+    whole ``values`` is scanned on each pickling.
     """
 
+    BUFFER_THRESHOLD: Optional[int] = None
+
     values: Dict[str, Any]
 
     def __init__(self, values: Dict[str, Any]) -> None:
@@ -376,3 +693,90 @@ class DictModel:
         Returns dictionary object to wrap."""
 
         return self.values
+
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        ret: Any = super().__reduce_ex__(protocol)
+        threshold = self.BUFFER_THRESHOLD
+        if threshold is None:
+            return ret
+
+        values = _wrap_buffers(self.values, threshold if protocol >= 5 else None)
+        if values is self.values:
+            return ret
+
+        # (copyreg.__newobj__, (cls,), state, ...)
+        state = dict(ret[2])
+        state["values"] = values
+        return (ret[0], ret[1], state) + tuple(ret[3:])
+
+
+class _Buffer:
+    __slots__ = ("data",)
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        self.data = data
+
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        return (_load_buffer, (pickle.PickleBuffer(self.data),))
+
+
+def _load_buffer(buf: Any) -> Any:
+    # In-band buffers are unpickled as bytes or bytearray.
+    if isinstance(buf, (bytes, bytearray)):
+        return buf
+    return memoryview(buf)
+
+
+def _wrap_buffers(obj: Any, threshold: Optional[int]) -> Any:
+    """Returns a copy of ``obj`` with large bytes wrapped by _Buffer, or ``obj``
+    itself if no bytes found. memoryview objects, which cannot be pickled, are
+    wrapped or converted to bytes. ``threshold`` is ``None`` to convert
+    memoryview only."""
+
+    if isinstance(obj, dict):
+        ret = None
+        for k, v in obj.items():
+            w = _wrap_buffers(v, threshold)
+            if w is not v:
+                if ret is None:
+                    ret = dict(obj)
+                ret[k] = w
+        return obj if ret is None else ret
+
+    if isinstance(obj, list):
+        seq = None
+        for i, v in enumerate(obj):
+            w = _wrap_buffers(v, threshold)
+            if w is not v:
+                if seq is None:
+                    seq = list(obj)
+                seq[i] = w
+        return obj if seq is None else seq
+
+    if isinstance(obj, memoryview):
+        if threshold is not None and obj.nbytes >= threshold and obj.contiguous:
+            return _Buffer(obj)
+        return obj.tobytes()
+
+    if threshold is not None and isinstance(obj, (bytes, bytearray)):
+        if len(obj) >= threshold:
+            return _Buffer(obj)
+
+    return obj
+
+
+def fields(cls: type) -> Dict[str, ItemAttrBase[Any]]:
+    """Returns attributes defined with ItemAttr, SequenceAttr and MappingAttr.
+
+    :param cls: Class to inspect.
+
+    Keys of the returned dictionary are attribute names of the class, in definition
+    order. Attributes inherited from base classes are included.
+    """
+
+    ret: Dict[str, ItemAttrBase[Any]] = {}
+    for klass in reversed(cls.__mro__):
+        for attrname, value in vars(klass).items():
+            if isinstance(value, ItemAttrBase):
+                ret[attrname] = value
+    return ret
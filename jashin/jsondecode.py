@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import base64
+import datetime
+import json
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    overload,
+)
+
+from .dictattr import fields
+from .jsondefault import TYPE_KEY, VALUE_KEY
+from .omit import OMIT
+
+__all__ = ["Decoder", "common"]
+
+T = TypeVar("T")
+Hook = Callable[[Dict[str, Any]], Any]
+
+_WS = " \t\n\r"
+_DELIMITERS = _WS + ",]"
+_NUMBERS = (int, float)
+_TAGGED_KEYS = frozenset((TYPE_KEY, VALUE_KEY))
+
+
+class Decoder:
+    """Registry of functions to restore objects from JSON objects.
+
+    This is the counterpart of :mod:`jashin.jsondefault`. Two kinds of JSON
+    objects are restored.
+
+    - Type-tagged objects such as ``{"__type__": "date", "value": "2020-01-01"}``,
+      built by :func:`jashin.jsondefault.tag`. Registered with :meth:`register`.
+    - Untagged objects with a fixed set of keys. Registered with
+      :meth:`register_schema` or :meth:`register_model`.
+
+    All the registrations are compiled into a table keyed by the set of keys of
+    the JSON object, so the ``object_hook`` costs one dictionary lookup per object.
+    Models with optional fields are matched by comparing sets of keys, which
+    costs a comparison per such model for objects not found in the table.
+    Registrations which match the same set of keys are rejected.
+
+    Usage::
+
+        decoder = jsondecode.Decoder()
+
+        @decoder.register("foo")
+        def load_foo(value):
+            return Foo(value)
+
+        decoder.register_model(User)
+
+        obj = decoder.loads(s)
+    """
+
+    _tags: Dict[str, Callable[[Any], Any]]
+    _schemas: Dict[FrozenSet[str], Hook]
+    # (required keys, allowed keys, function) of models with optional fields
+    _ranges: List[Tuple[FrozenSet[str], FrozenSet[str], Hook]]
+    _models: Set[Hook]
+    _hook: Optional[Hook]
+
+    def __init__(self) -> None:
+        self._tags = {}
+        self._schemas = {}
+        self._ranges = []
+        self._models = set()
+        self._hook = None
+
+    @overload
+    def register(self, tag: str) -> Callable[[Callable[[Any], T]], Callable[[Any], T]]:
+        ...
+
+    @overload
+    def register(self, tag: str, func: Callable[[Any], T]) -> Callable[[Any], T]:
+        ...
+
+    def register(self, tag: str, func: Optional[Callable[[Any], T]] = None) -> Any:
+        """Register function to restore objects tagged with ``tag``.
+
+        The function is called with the ``value`` of the tagged object. Can be
+        used as a decorator if ``func`` is omitted.
+        """
+
+        if func is None:
+
+            def deco(f: Callable[[Any], T]) -> Callable[[Any], T]:
+                self.register(tag, f)
+                return f
+
+            return deco
+
+        self._tags[tag] = func
+        self._hook = None
+        return func
+
+    def register_schema(self, keys: Iterable[str], func: Hook) -> Hook:
+        """Register function to restore untagged objects with exactly ``keys``.
+
+        The function is called with the JSON object.
+        """
+
+        keyset = frozenset(keys)
+        self._check_conflict(keyset, keyset, func)
+        self._schemas[keyset] = func
+        self._hook = None
+        return func
+
+    def _check_conflict(
+        self, required: FrozenSet[str], allowed: FrozenSet[str], func: Hook
+    ) -> None:
+        """Raise ValueError if objects with keys between ``required`` and
+        ``allowed`` are matched by another registration."""
+
+        if required <= _TAGGED_KEYS <= allowed:
+            raise ValueError(f"{sorted(_TAGGED_KEYS)} is reserved for tagged objects")
+
+        for keys, f in self._schemas.items():
+            if f is not func and required <= keys <= allowed:
+                raise ValueError(f"{sorted(keys)} is already registered for {f!r}")
+
+        for r, a, f in self._ranges:
+            common = allowed & a
+            if f is not func and common and (required | r) <= common:
+                raise ValueError(
+                    f"{sorted(required | r)} is already registered for {f!r}"
+                )
+
+    def register_model(
+        self, cls: Callable[[Dict[str, Any]], T], keys: Optional[Iterable[str]] = None
+    ) -> Callable[[Dict[str, Any]], T]:
+        """Register DictModel class to wrap JSON objects.
+
+        :param cls: DictModel class.
+        :param keys: Keys of JSON objects to be wrapped. Default to the keys of
+                     ItemAttr, SequenceAttr and MappingAttr defined in the class,
+                     or the first key of their ``path``.
+
+        JSON objects are restored from the innermost, so models nested in a
+        model are restored first. They are replaced with their dictionaries
+        when the outer model is built, and restored again by the fields of the
+        outer model (e.g. ``ItemAttr(Child)``).
+
+        If ``keys`` is given, objects are matched by the exact set of keys.
+        Otherwise, keys of the fields with ``default`` may be missing from the
+        objects, and other keys are required. Raises ValueError if objects
+        with the same set of keys are matched by another registration.
+        """
+
+        self._models.add(cls)
+        if keys is not None:
+            self.register_schema(keys, cls)
+            return cls
+
+        required: Set[str] = set()
+        optional: Set[str] = set()
+        for f in fields(cls).values():  # type: ignore
+            if not f.name:
+                continue
+            key = str(f.keys[0]) if f.keys else f.name
+            if f.default is OMIT:
+                required.add(key)
+            else:
+                optional.add(key)
+        optional -= required
+
+        if not optional:
+            self.register_schema(required, cls)
+            return cls
+
+        keys_range = (frozenset(required), frozenset(required | optional), cls)
+        if keys_range not in self._ranges:
+            self._check_conflict(*keys_range)
+            self._ranges.append(keys_range)
+            self._hook = None
+        return cls
+
+    def _compile(self) -> Hook:
+        models = frozenset(self._models)
+        table: Dict[FrozenSet[str], Hook] = {
+            keys: _model_loader(f, models) if f in models else f
+            for keys, f in self._schemas.items()
+        }
+        ranges = [
+            (required, allowed, _model_loader(f, models))
+            for required, allowed, f in self._ranges
+        ]
+        tags = dict(self._tags)
+
+        if tags:
+
+            def load_tagged(obj: Dict[str, Any]) -> Any:
+                f = tags.get(obj[TYPE_KEY])
+                if f is None:
+                    return obj
+                return f(obj[VALUE_KEY])
+
+            table[_TAGGED_KEYS] = load_tagged
+
+        sizes: Set[int] = {len(k) for k in table}
+        get = table.get
+        # Range of number of keys matched by ranges. Empty objects are not matched.
+        lo = max(1, min((len(r) for r, _, _ in ranges), default=0))
+        hi = max((len(a) for _, a, _ in ranges), default=0)
+
+        def object_hook(obj: Dict[str, Any]) -> Any:
+            n = len(obj)
+            if n in sizes:
+                f = get(frozenset(obj))
+                if f is not None:
+                    return f(obj)
+            if lo <= n <= hi:
+                keys = frozenset(obj)
+                for required, allowed, f in ranges:
+                    if required <= keys <= allowed:
+                        return f(obj)
+            return obj
+
+        return object_hook
+
+    @property
+    def object_hook(self) -> Hook:
+        """``object_hook`` function for ``json.loads()`` and ``json.load()``."""
+
+        hook = self._hook
+        if hook is None:
+            hook = self._hook = self._compile()
+        return hook
+
+    def loads(self, s: str, **kwargs: Any) -> Any:
+        """Deserialize JSON string ``s`` with the registered functions."""
+
+        return json.loads(s, object_hook=self.object_hook, **kwargs)
+
+    def load(self, fp: IO[str], **kwargs: Any) -> Any:
+        """Deserialize JSON file ``fp`` with the registered functions."""
+
+        return json.load(fp, object_hook=self.object_hook, **kwargs)
+
+    def iterload(self, fp: IO[str], bufsize: int = 65536) -> Iterator[Any]:
+        """Iterate elements of JSON array in ``fp`` without reading whole file.
+
+        :param fp: Text file contains a JSON array.
+        :param bufsize: Number of characters to read at once.
+
+        Each element is deserialized with the registered functions. Memory
+        consumption is bounded by the size of the largest element.
+        """
+
+        decode = json.JSONDecoder(object_hook=self.object_hook).raw_decode
+
+        buf = ""
+        pos = 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            chunk = fp.read(bufsize)
+            if not chunk:
+                eof = True
+                return False
+            buf = buf[pos:] + chunk
+            pos = 0
+            return True
+
+        def skipws() -> str:
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in _WS:
+                    pos += 1
+                if pos < len(buf):
+                    return buf[pos]
+                if not fill():
+                    return ""
+
+        if skipws() != "[":
+            raise ValueError("JSON array expected")
+        pos += 1
+
+        if skipws() == "]":
+            pos += 1
+            return
+
+        while True:
+            skipws()
+            while True:
+                try:
+                    value, end = decode(buf, pos)
+                except json.JSONDecodeError:
+                    if not fill():
+                        raise
+                    continue
+
+                # Ensure that the value is not truncated. A number is complete
+                # only if followed by a delimiter (e.g. "123" of "123.45").
+                if end == len(buf) or (
+                    type(value) in _NUMBERS and buf[end] not in _DELIMITERS
+                ):
+                    if fill():
+                        continue
+                break
+
+            pos = end
+            yield value
+
+            c = skipws()
+            if c == "]":
+                return
+            if c != ",":
+                raise ValueError(f"',' or ']' expected at {pos}")
+            pos += 1
+
+
+def _unwrap_models(container: Any, models: FrozenSet[Hook]) -> None:
+    """Replace models in ``container`` with their dictionaries, in place.
+
+    Models are not searched, since they were unwrapped when built."""
+
+    items: Iterable[Tuple[Any, Any]]
+    items = container.items() if isinstance(container, dict) else enumerate(container)
+    for k, v in items:
+        if type(v) in models:
+            container[k] = v.__dictattr_get__()
+        elif isinstance(v, (dict, list)):
+            _unwrap_models(v, models)
+
+
+def _model_loader(cls: Hook, models: FrozenSet[Hook]) -> Hook:
+    def load(obj: Dict[str, Any]) -> Any:
+        _unwrap_models(obj, models)
+        return cls(obj)
+
+    return load
+
+
+def _load_date(value: str) -> datetime.date:
+    return datetime.date.fromisoformat(value)
+
+
+def _load_datetime(value: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(value)
+
+
+def _load_bytes(value: str) -> bytes:
+    return base64.b64decode(value)
+
+
+def _load_set(value: Iterable[Any]) -> Set[Any]:
+    return set(value)
+
+
+def common() -> Decoder:
+    """A decoder for objects tagged by :func:`jashin.jsondefault.tagged`.
+
+    - {"__type__": "datetime", "value": ...} -> datetime.datetime
+    - {"__type__": "date", "value": ...} -> datetime.date
+    - {"__type__": "bytes", "value": ...} -> bytes
+    - {"__type__": "set", "value": ...} -> set
+
+    ex::
+        s = json.dumps([{1,2,3}, datetime.datetime.now()], default=jsondefault.tagged())
+        jsondecode.common().loads(s)
+    """
+
+    decoder = Decoder()
+    decoder.register("datetime", _load_datetime)
+    decoder.register("date", _load_date)
+    decoder.register("bytes", _load_bytes)
+    decoder.register("set", _load_set)
+    return decoder
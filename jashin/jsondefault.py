@@ -4,9 +4,22 @@ import base64
 import collections.abc
 import datetime
 import functools
-from typing import Any, List
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
 
-__all__ = ["converter", "common"]
+from .dictattr import DictModel, ItemAttrBase, MappingAttr, SequenceAttr, fields
+
+__all__ = [
+    "converter",
+    "common",
+    "tagged",
+    "tag",
+    "model_serializer",
+    "TYPE_KEY",
+    "VALUE_KEY",
+]
+
+TYPE_KEY = "__type__"
+VALUE_KEY = "value"
 
 
 def converter() -> functools._SingleDispatchCallable[Any]:
@@ -48,7 +61,7 @@ def common() -> functools._SingleDispatchCallable[Any]:
     """A set of common JSON converter.
 
     - datetime.date/datetime.datetime -> ISO 8601 format(e.g. YYYY-MM-DD).
-    - bytes -> Encoded string in BASE64.
+    - bytes/bytearray/memoryview -> Encoded string in BASE64.
     - Iterables(set, generator, dict.keys(), etc,.) -> list.
 
     ex::
@@ -65,7 +78,9 @@ def common() -> functools._SingleDispatchCallable[Any]:
     def conv_datetime(obj: datetime.date) -> str:
         return obj.isoformat()
 
-    @repo.register
+    @repo.register(bytes)
+    @repo.register(bytearray)
+    @repo.register(memoryview)
     def conv_bytes(obj: bytes) -> str:
         return base64.b64encode(obj).decode("ascii")
 
@@ -74,3 +89,201 @@ def common() -> functools._SingleDispatchCallable[Any]:
         return list(obj)
 
     return repo
+
+
+def tag(name: str, value: Any) -> Dict[str, Any]:
+    """Build a type-tagged JSON object.
+
+    Tagged objects are restored by :class:`jashin.jsondecode.Decoder` with the
+    function registered for ``name``.
+
+    ex::
+        @repo.register
+        def conv_foo(obj: Foo) -> Dict[str, Any]:
+            return jsondefault.tag("foo", obj.a)
+    """
+    return {TYPE_KEY: name, VALUE_KEY: value}
+
+
+def tagged() -> functools._SingleDispatchCallable[Any]:
+    """A set of JSON converter that keeps type of the objects.
+
+    - datetime.datetime -> {"__type__": "datetime", "value": ISO 8601 string}
+    - datetime.date -> {"__type__": "date", "value": ISO 8601 string}
+    - bytes/bytearray/memoryview -> {"__type__": "bytes", "value": Encoded string in BASE64}
+    - set/frozenset -> {"__type__": "set", "value": list}
+    - DictModel -> The wrapped dictionary.
+    - Other Iterables(generator, dict.keys(), etc,.) -> list.
+
+    Use :func:`jashin.jsondecode.common` to restore the objects.
+
+    ex::
+        s = json.dumps([{1,2,3}, datetime.datetime.now()], default=tagged())
+        json.loads(s, object_hook=jsondecode.common().object_hook)
+    """
+
+    repo = converter()
+
+    @repo.register
+    def conv_datetime(obj: datetime.datetime) -> Dict[str, Any]:
+        return tag("datetime", obj.isoformat())
+
+    @repo.register
+    def conv_date(obj: datetime.date) -> Dict[str, Any]:
+        return tag("date", obj.isoformat())
+
+    @repo.register(bytes)
+    @repo.register(bytearray)
+    @repo.register(memoryview)
+    def conv_bytes(obj: bytes) -> Dict[str, Any]:
+        return tag("bytes", base64.b64encode(obj).decode("ascii"))
+
+    @repo.register(set)
+    @repo.register(frozenset)
+    def conv_set(obj: collections.abc.Set[Any]) -> Dict[str, Any]:
+        return tag("set", list(obj))
+
+    @repo.register
+    def conv_model(obj: DictModel) -> Dict[str, Any]:
+        return obj.values
+
+    @repo.register(collections.abc.Iterable)
+    def conv_iterable(obj: collections.abc.Iterable[Any]) -> List[Any]:
+        return list(obj)
+
+    return repo
+
+
+# Types serialized by json module as is.
+_NATIVE_TYPES = (str, int, float, bool, type(None), list, tuple, dict)
+
+
+def _declared_type(attr: ItemAttrBase[Any]) -> Any:
+    """Returns type of values declared by ``ItemAttr[T]()``, ``ItemAttr(T)``, etc."""
+
+    load, dump = attr.funcs
+    if dump is not None:
+        # Values are stored by dump(), type unknown.
+        return None
+
+    orig = getattr(attr, "__orig_class__", None)
+    if orig is not None:
+        args = orig.__args__
+        t = args[1] if isinstance(attr, MappingAttr) else args[0]
+    elif isinstance(load, type):
+        t = load
+    else:
+        return None
+
+    if getattr(t, "__origin__", None) is Union:
+        # Optional[T]
+        args = [a for a in t.__args__ if a is not type(None)]
+        if len(args) != 1:
+            return None
+        t = args[0]
+
+    # Set[int] -> set
+    t = getattr(t, "__origin__", t)
+    return t if isinstance(t, type) else None
+
+
+def model_serializer(
+    cls: Type[DictModel], default: Optional[Callable[[Any], Any]] = None
+) -> Callable[[DictModel], Dict[str, Any]]:
+    """Returns a function to convert DictModel objects of ``cls`` for JSON.
+
+    :param cls: DictModel class.
+    :param default: Converter such as :func:`common` and :func:`tagged`. Default to
+                    :func:`common`.
+
+    The returned function converts values of the fields declared with a type
+    (e.g. ``ItemAttr[datetime.date]()`` or ``SequenceAttr(datetime.date)``) in
+    ``obj.values``, with the converter function looked up only once for the field.
+    Values of nested DictModel fields are converted recursively. The result is
+    a shallow copy of ``obj.values`` with the converted values, and the values
+    of undeclared types are left to ``default`` of ``json.dumps()``.
+
+    Fields with ``dump`` function are not converted, since they store values
+    already converted by ``dump``.
+
+    ex::
+        repo = jsondefault.common()
+        serialize = jsondefault.model_serializer(User, repo)
+        json.dumps([serialize(user) for user in users], default=repo)
+    """
+
+    repo: Any = default if default is not None else common()
+    base = repo.registry[object] if hasattr(repo, "registry") else None
+    converters: Dict[type, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+
+    def get_converter(model: type) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        f = converters.get(model)
+        if f is None:
+            f = compile_model(model)
+        return f
+
+    def value_func(t: type) -> Optional[Callable[[Any], Any]]:
+        if issubclass(t, DictModel):
+            nested = get_converter(t)
+            return lambda v: nested(v) if type(v) is dict else v
+
+        if issubclass(t, _NATIVE_TYPES):
+            return None
+
+        conv = repo.dispatch(t) if base is not None else repo
+        if conv is base:
+            return None
+        return lambda v: conv(v) if type(v) is t else v
+
+    def compile_model(model: type) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        ops: List[Tuple[str, Callable[[Any], Any]]] = []
+
+        def convert(values: Dict[str, Any]) -> Dict[str, Any]:
+            if not ops:
+                return values
+            ret = dict(values)
+            for key, op in ops:
+                if key in ret:
+                    ret[key] = op(ret[key])
+            return ret
+
+        # Register before compiling fields for recursive models.
+        converters[model] = convert
+
+        for attr in fields(model).values():
+            if not attr.name or attr.keys is not None:
+                continue
+            t = _declared_type(attr)
+            f = value_func(t) if t is not None else None
+            if f is None:
+                continue
+
+            op: Callable[[Any], Any]
+            if isinstance(attr, SequenceAttr):
+                op = functools.partial(_convert_list, f)
+            elif isinstance(attr, MappingAttr):
+                op = functools.partial(_convert_dict, f)
+            else:
+                op = f
+            ops.append((attr.name, op))
+
+        return convert
+
+    convert = get_converter(cls)
+
+    def serialize(obj: DictModel) -> Dict[str, Any]:
+        return convert(obj.values)
+
+    return serialize
+
+
+def _convert_list(f: Callable[[Any], Any], v: Any) -> Any:
+    if type(v) is not list:
+        return v
+    return [f(e) for e in v]
+
+
+def _convert_dict(f: Callable[[Any], Any], v: Any) -> Any:
+    if type(v) is not dict:
+        return v
+    return {k: f(e) for k, e in v.items()}
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import concurrent.futures
+import json
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+__all__ = ["dumps", "dump"]
+
+ConverterFactory = Callable[[], Callable[[Any], Any]]
+
+# Converters built in worker processes, keyed by the factory.
+_converters: Dict[ConverterFactory, Callable[[Any], Any]] = {}
+
+
+def _encode_chunk(
+    factory: Optional[ConverterFactory], kwargs: Dict[str, Any], chunk: List[Any]
+) -> bytes:
+    default = None
+    if factory is not None:
+        default = _converters.get(factory)
+        if default is None:
+            default = _converters[factory] = factory()
+
+    s = json.dumps(chunk, default=default, **kwargs)
+
+    # strip brackets of the array
+    s = s[1:-1]
+    if kwargs.get("indent") is not None:
+        # strip newline before the closing bracket
+        s = s[:-1]
+
+    return s.encode("utf-8")
+
+
+def _fragments(
+    obj: Sequence[Any],
+    default: Optional[ConverterFactory],
+    chunksize: int,
+    executor: Optional[concurrent.futures.Executor],
+    processes: Optional[int],
+    kwargs: Dict[str, Any],
+) -> Iterator[bytes]:
+    if kwargs.get("separators"):
+        sep = kwargs["separators"][0]
+    elif kwargs.get("indent") is not None:
+        sep = ","
+    else:
+        sep = ", "
+
+    chunks = [obj[i : i + chunksize] for i in range(0, len(obj), chunksize)]
+
+    owned = None
+    if len(chunks) <= 1:
+        # Not worth to run in parallel.
+        frags: Iterator[bytes] = (
+            _encode_chunk(default, kwargs, list(c)) for c in chunks
+        )
+    else:
+        if executor is None:
+            executor = owned = concurrent.futures.ProcessPoolExecutor(processes)
+        n = len(chunks)
+        frags = executor.map(_encode_chunk, [default] * n, [kwargs] * n, chunks)
+
+    try:
+        closing = b"\n]" if kwargs.get("indent") is not None else b"]"
+        bsep = sep.encode("utf-8")
+
+        yield b"["
+        first = True
+        for frag in frags:
+            if not first:
+                yield bsep
+            first = False
+            yield frag
+
+        if first:
+            yield b"]"
+        else:
+            yield closing
+    finally:
+        if owned is not None:
+            owned.shutdown()
+
+
+def dumps(
+    obj: Sequence[Any],
+    default: Optional[ConverterFactory] = None,
+    *,
+    chunksize: int = 10000,
+    executor: Optional[concurrent.futures.Executor] = None,
+    processes: Optional[int] = None,
+    **kwargs: Any,
+) -> bytes:
+    """Serialize a large list into JSON in parallel.
+
+    :param obj: List to serialize.
+    :param default: Function which returns ``default`` function for
+                    ``json.dumps()``. Called once in each worker process, so
+                    it must be picklable (e.g. :func:`jashin.jsondefault.common`).
+    :param chunksize: Number of elements to encode in a task.
+    :param executor: Executor to run the tasks. If omitted, a new
+                     ``ProcessPoolExecutor`` is created for the call.
+    :param processes: Number of worker processes of the new ``ProcessPoolExecutor``.
+    :param kwargs: Other arguments for ``json.dumps()``.
+
+    ``obj`` is split into chunks of ``chunksize`` elements, and each chunk is
+    encoded in worker processes. The result is same as
+    ``json.dumps(obj, default=default(), **kwargs).encode("utf-8")``.
+
+    Elements are pickled to be sent to worker processes, so this is faster than
+    ``json.dumps()`` only if the conversion is heavier than pickling. Reuse an
+    ``executor`` to avoid startup cost of worker processes.
+
+    ex::
+        s = jsonpool.dumps(records, jsondefault.common, processes=4)
+    """
+
+    return b"".join(_fragments(obj, default, chunksize, executor, processes, kwargs))
+
+
+def dump(
+    obj: Sequence[Any],
+    fp: IO[bytes],
+    default: Optional[ConverterFactory] = None,
+    *,
+    chunksize: int = 10000,
+    executor: Optional[concurrent.futures.Executor] = None,
+    processes: Optional[int] = None,
+    **kwargs: Any,
+) -> None:
+    """Serialize a large list into binary file ``fp`` in parallel.
+
+    Arguments are same as :func:`dumps`. Encoded chunks are written to ``fp``
+    in order as they become available.
+    """
+
+    for frag in _fragments(obj, default, chunksize, executor, processes, kwargs):
+        fp.write(frag)
@@ -1,7 +1,13 @@
 import enum
-from typing import Any, Dict
+import pickle
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+import pytest
 
 from jashin.dictattr import *
+from jashin.elapsed import Elapsed
 
 
 def test_dictattr() -> None:
@@ -229,3 +235,252 @@ def test_Dict_set() -> None:
     d3.field1["1"] = c
 
     assert d3.values["field1"]["1"]["field1"] == "600"
+
+
+def test_instrument() -> None:
+    class Child(DictModel):
+        field1 = ItemAttr(int, str)
+
+    class Parent(DictModel):
+        child = ItemAttr(Child)
+        children = SequenceAttr(Child)
+        mapping = MappingAttr[str, Child](Child)
+        plain = ItemAttr[str]()
+
+    events: List[Tuple[str, str, str, int]] = []
+
+    def sink(event: str, cls: str, field: str, ns: int) -> None:
+        events.append((event, cls.split(".")[-1], field, ns))
+
+    d = Parent(
+        {
+            "child": {"field1": "1"},
+            "children": [{"field1": "2"}],
+            "mapping": {"a": {"field1": "3"}},
+            "plain": "abc",
+        }
+    )
+
+    prev = set_instrument(sink)
+    try:
+        assert d.child.field1 == 1
+        assert d.children[0].field1 == 2
+        assert d.mapping["a"].field1 == 3
+        assert d.plain == "abc"
+        d.child.field1 = 10
+        d.children = [Child({"field1": "20"})]
+    finally:
+        set_instrument(prev)
+
+    assert [e[:3] for e in events] == [
+        ("load", "Parent", "child"),
+        ("get", "Parent", "child"),
+        ("load", "Child", "field1"),
+        ("get", "Child", "field1"),
+        ("view", "Parent", "children"),
+        ("get", "Parent", "children"),
+        ("load", "Parent", "children"),
+        ("load", "Child", "field1"),
+        ("get", "Child", "field1"),
+        ("view", "Parent", "mapping"),
+        ("get", "Parent", "mapping"),
+        ("load", "Parent", "mapping"),
+        ("load", "Child", "field1"),
+        ("get", "Child", "field1"),
+        ("get", "Parent", "plain"),
+        ("load", "Parent", "child"),
+        ("get", "Parent", "child"),
+        ("dump", "Child", "field1"),
+        ("set", "Child", "field1"),
+        ("set", "Parent", "children"),
+    ]
+    assert all(e[3] >= 0 for e in events)
+    assert d.values["child"] == {"field1": "10"}
+    assert d.values["children"] == [{"field1": "20"}]
+
+    events.clear()
+    assert d.child.field1 == 10
+    assert not events
+
+
+def test_elapsed_sink() -> None:
+    def slow(v: str) -> int:
+        t = time.perf_counter() + 0.001
+        while time.perf_counter() < t:
+            pass
+        return int(v)
+
+    class Child(DictModel):
+        field1 = ItemAttr(slow)
+        field2 = SequenceAttr(int)
+
+    prefix = "test_elapsed_sink.<locals>.Child"
+    e = Elapsed()
+    prev = set_instrument(elapsed_sink(e))
+    try:
+        with e("request"):
+            for i in range(10):
+                c = Child({"field1": "1", "field2": ["2"]})
+                assert c.field1 == 1
+                assert c.field2[0] == 2
+    finally:
+        set_instrument(prev)
+
+    rec = e.result(f"{prefix}.field1:load")
+    assert rec
+    assert rec.n == 10
+
+    (request,) = e.tree()
+    nodes = {node.name: node for node in request.children}
+    assert set(nodes) == {
+        f"{prefix}.field1:get",
+        f"{prefix}.field2:get",
+        f"{prefix}.field2:load",
+    }
+
+    get = nodes[f"{prefix}.field1:get"]
+    (load,) = get.children
+    assert load.path == ("request", f"{prefix}.field1:get", f"{prefix}.field1:load")
+    assert load.n == 10
+    assert load.inclusive <= get.inclusive
+    assert get.exclusive == pytest.approx(get.inclusive - load.inclusive)
+    assert get.exclusive < load.inclusive
+
+    # Children of the request are not counted twice.
+    assert sum(node.inclusive for node in request.children) <= request.inclusive
+    assert request.exclusive > 0
+
+
+class Blob(DictModel):
+    BUFFER_THRESHOLD = 65536
+
+    name = ItemAttr[str]()
+    data = ItemAttr[bytes]()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 8), reason="requires pickle protocol 5")
+def test_pickle_buffer() -> None:
+    large = b"x" * Blob.BUFFER_THRESHOLD
+    d = {"name": "blob", "data": large, "chunks": [bytearray(large), b"small"]}
+    obj = Blob(d)
+
+    buffers: List[Any] = []
+    s = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    assert len(buffers) == 2
+    assert len(s) < 1000
+
+    ret = pickle.loads(s, buffers=buffers)
+    assert type(ret) is Blob
+    assert isinstance(ret.data, memoryview)
+    assert ret.data == large
+    assert ret.values["chunks"][0] == large
+    assert ret.values["chunks"][1] == b"small"
+
+    # Values of the original object are not modified.
+    assert obj.values is d
+    assert obj.values["data"] is large
+
+    # Restored memoryview is pickled again.
+    again: List[Any] = []
+    s = pickle.dumps(ret, protocol=5, buffer_callback=again.append)
+    assert len(again) == 2
+    ret2 = pickle.loads(s, buffers=again)
+    assert isinstance(ret2.data, memoryview)
+    assert ret2.values == d
+
+    for protocol in (4, 5):
+        ret2 = pickle.loads(pickle.dumps(ret, protocol=protocol))
+        assert ret2.values == d
+        assert ret2.data == large
+        assert not isinstance(ret2.data, memoryview)
+
+    small = Blob({"data": memoryview(b"small")})
+    assert pickle.loads(pickle.dumps(small, protocol=5)).data == b"small"
+
+    # in-band
+    ret = pickle.loads(pickle.dumps(obj, protocol=5))
+    assert ret.values == d
+    assert type(ret.values["chunks"][0]) is bytearray
+
+    ret = pickle.loads(pickle.dumps(obj, protocol=4))
+    assert ret.values == d
+
+    # Disabled by default
+    buffers.clear()
+    s = pickle.dumps(DictModel(d), protocol=5, buffer_callback=buffers.append)
+    assert buffers == []
+    assert pickle.loads(s).values == d
+
+
+def test_path() -> None:
+    class Order(DictModel):
+        city = ItemAttr[str](path="customer.addresses[0].city")
+        last = ItemAttr[str](path="customer.addresses[-1].city", default="unknown")
+        zip = ItemAttr(int, str, path="customer.addresses[0].zip")
+        note = ItemAttr[str](path="meta.note", default="")
+        tags = SequenceAttr(str.upper, path="meta.tags")
+        attrs = MappingAttr[str, int](path="meta.attrs")
+
+    d: Dict[str, Any] = {
+        "customer": {"addresses": [{"city": "Tokyo", "zip": "100"}, {"city": "Osaka"}]}
+    }
+    order = Order(d)
+    assert order.city == "Tokyo"
+    assert order.last == "Osaka"
+    assert order.zip == 100
+    assert order.note == ""
+
+    order.city = "Kyoto"
+    order.zip = 200
+    assert d["customer"]["addresses"][0] == {"city": "Kyoto", "zip": "200"}
+
+    # missing dictionaries are created
+    order.note = "note"
+    order.tags = ["a", "b"]
+    order.attrs = {"x": 1}
+    assert d["meta"] == {"note": "note", "tags": ["a", "b"], "attrs": {"x": 1}}
+    assert list(order.tags) == ["A", "B"]
+    assert order.attrs["x"] == 1
+
+    del order.note
+    assert d["meta"] == {"tags": ["a", "b"], "attrs": {"x": 1}}
+
+    empty = Order({"customer": {"addresses": []}})
+    assert empty.last == "unknown"
+    with pytest.raises(ValueError, match=r"customer.addresses\[0\].city"):
+        empty.city
+    with pytest.raises(ValueError):
+        empty.city = "Kyoto"
+
+    assert Order({"customer": None}).last == "unknown"
+
+    # deleting missing path does not create dictionaries
+    d = {}
+    with pytest.raises(KeyError):
+        del Order(d).note
+    assert d == {}
+    with pytest.raises(KeyError):
+        del Order(d).city
+    assert d == {}
+
+    # indexes are not applied to strings
+    class Name(DictModel):
+        first = ItemAttr[str](path="name[0]", default=None)
+        initial = ItemAttr[str](path="name[0].x")
+
+    assert Name({"name": "abc"}).first is None
+    assert Name({"name": ["abc"]}).first == "abc"
+    with pytest.raises(ValueError):
+        Name({"name": "abc"}).initial = "x"
+
+
+def test_path_parse() -> None:
+    assert ItemAttr[Any](path="a").keys == ("a",)
+    assert ItemAttr[Any](path="a.b[1][-2].c").keys == ("a", "b", 1, -2, "c")
+
+    for path in ["", "a..b", "a.[0]", "a[x]", "a[0]b", ".a"]:
+        with pytest.raises(ValueError):
+            ItemAttr[Any](path=path)
+
+    with pytest.raises(ValueError):
+        ItemAttr[Any](name="a", path="a")
@@ -1,5 +1,17 @@
+import asyncio
+import gc
+import json
+import multiprocessing
+import os
+import pathlib
+import threading
+import time
+import tracemalloc
 from contextlib import redirect_stdout
 from io import StringIO
+from typing import Any, Optional
+
+import pytest
 
 from jashin import elapsed
 
@@ -24,9 +36,10 @@ def test_elapsed() -> None:
 
     test()
 
-    assert e._map["block1"][1] == 10
-    assert e._map["block2"][1] == 100
-    assert e._map["block3"][1] == 200
+    for name, n in [("block1", 10), ("block2", 100), ("block3", 200)]:
+        rec = e.result(name)
+        assert rec
+        assert rec.n == n
 
     e.print()
 
@@ -50,3 +63,740 @@ def test_elapsed() -> None:
 
     s = f.getvalue().strip().split("\n")
     assert len(s) == 1
+
+
+def test_decorator() -> None:
+    e = elapsed.Elapsed()
+
+    @e("func")
+    def func(n: int) -> int:
+        if n:
+            return func(n - 1) + 1
+        return 0
+
+    assert func(9) == 9
+    assert func.__name__ == "func"
+
+    rec = e.result("func")
+    assert rec
+    assert rec.n == 10
+
+
+def test_exception() -> None:
+    e = elapsed.Elapsed()
+
+    try:
+        with e("error"):
+            raise ValueError()
+    except ValueError:
+        pass
+
+    assert e._stack.get() is None
+    rec = e.result("error")
+    assert rec
+    assert rec.n == 1
+
+
+def test_overhead() -> None:
+    assert 0 <= elapsed.Elapsed.overhead(1000) < 0.001
+
+
+def test_histogram() -> None:
+    hist = elapsed.Histogram()
+    for i in range(1, 100001):
+        hist.add(i * 1000)
+
+    assert hist.n == 100000
+    assert hist.min == 1000
+    assert hist.max == 100000000
+
+    for p in (50, 90, 99, 99.9):
+        expected = 100000000 * p / 100
+        assert abs(hist.percentile(p) - expected) / expected < 2**-hist.SUB_BITS
+
+    assert hist.percentile(100) == hist.max
+    assert hist.percentile(0) == hist.min
+    assert abs(hist.stddev() - 28867513) / 28867513 < 0.001
+    assert len(hist.buckets) < 1000
+
+    small = elapsed.Histogram()
+    for i in range(32):
+        small.add(i)
+    assert [small.percentile(p) for p in (0, 50, 100)] == [0, 15, 31]
+
+
+def test_merge() -> None:
+    e1 = elapsed.Elapsed()
+    e2 = elapsed.Elapsed()
+    for i in range(10):
+        with e1("a"):
+            pass
+        with e2("a"):
+            pass
+        with e2("b"):
+            pass
+
+    e = elapsed.Elapsed()
+    e.merge([e1, e2])
+
+    rec = e.result("a")
+    assert rec
+    assert rec.n == 20
+    assert rec.min <= rec.p50 <= rec.p99 <= rec.max
+    assert [r.name for r in e.results() if r] == ["a", "b"]
+
+
+def test_threads() -> None:
+    e = elapsed.Elapsed()
+    barrier = threading.Barrier(4)
+
+    def run(n: int) -> None:
+        barrier.wait()
+        for i in range(1000):
+            e.begin(f"outer{n}")
+            with e(f"inner{n}"):
+                pass
+            e.end()
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for n in range(4):
+        for name in (f"outer{n}", f"inner{n}"):
+            rec = e.result(name)
+            assert rec
+            assert rec.n == 1000
+
+
+def test_asyncio() -> None:
+    e = elapsed.Elapsed()
+
+    @e("decorated")
+    async def decorated() -> None:
+        await asyncio.sleep(0)
+
+    async def task(n: int) -> None:
+        for i in range(10):
+            async with e(f"task{n}"):
+                await asyncio.sleep(0.001 * n)
+                await decorated()
+
+    async def main() -> None:
+        await asyncio.gather(*(task(n) for n in range(3)))
+
+    asyncio.run(main())
+
+    for n in range(3):
+        rec = e.result(f"task{n}")
+        assert rec
+        assert rec.n == 10
+        assert rec.min >= 0.001 * n
+
+    rec = e.result("decorated")
+    assert rec
+    assert rec.n == 30
+
+
+def test_tree() -> None:
+    e = elapsed.Elapsed()
+
+    for i in range(2):
+        with e("request"):
+            time.sleep(0.01)
+            with e("db"):
+                time.sleep(0.02)
+            with e("render"):
+                with e("db"):
+                    time.sleep(0.01)
+
+    roots = e.tree()
+    assert [r.name for r in roots] == ["request"]
+
+    request = roots[0]
+    assert request.n == 2
+    assert request.percent == 100
+    assert 0.02 <= request.exclusive < request.inclusive
+    assert [c.name for c in request.children] == ["db", "render"]
+
+    db, render = request.children
+    assert db.path == ("request", "db")
+    assert db.n == 2
+    assert db.inclusive == db.exclusive
+    assert 0 < render.exclusive < render.children[0].inclusive
+    assert 0 < sum(c.percent for c in request.children) < 100
+
+    # flat results combine sections of the same name
+    rec = e.result("db")
+    assert rec
+    assert rec.n == 4
+
+    f = StringIO()
+    with redirect_stdout(f):
+        e.print_tree()
+
+    lines = f.getvalue().splitlines()
+    assert len(lines) == 4
+    assert lines[3].startswith("    db:")
+
+
+def test_export() -> None:
+    e = elapsed.Elapsed(trace=5)
+
+    async def task() -> None:
+        with e("task"):
+            pass
+
+    for i in range(10):
+        with e('a "quoted"\nname'):
+            with e("child"):
+                pass
+
+    asyncio.run(task())
+
+    metrics = e.to_openmetrics().splitlines()
+    assert metrics[-1] == "# EOF"
+    assert 'elapsed_seconds_count{section="a \\"quoted\\"\\nname"} 10' in metrics
+    assert 'elapsed_seconds_count{section="child"} 10' in metrics
+    assert len([m for m in metrics if 'quantile="0.99"' in m]) == 3
+
+    d = json.loads(e.to_json())
+    assert [s["name"] for s in d["sections"]] == ['a "quoted"\nname', "child", "task"]
+    assert d["tree"][0]["children"][0]["path"] == ['a "quoted"\nname', "child"]
+
+    f = StringIO()
+    e.write_trace(f)
+    events = json.loads(f.getvalue())["traceEvents"]
+    assert len(events) == 5
+    assert events[-1]["name"] == "task"
+    assert "task" in events[-1]["args"]
+    assert events[-2]["args"] == {"path": 'a "quoted"\nname'}
+    assert all(ev["ph"] == "X" and ev["dur"] >= 0 for ev in events)
+
+
+def _worker(spool: str, n: int) -> None:
+    e = elapsed.Elapsed(spool=spool)
+    for i in range(n):
+        with e("worker"):
+            with e("child"):
+                pass
+
+
+_pool_elapsed: Optional[elapsed.Elapsed] = None
+
+
+def _pool_work(i: int) -> int:
+    assert _pool_elapsed
+    with _pool_elapsed("pool"):
+        return i
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_spool_inherited(tmp_path: pathlib.Path) -> None:
+    global _pool_elapsed
+    spool = str(tmp_path / "spool")
+    _pool_elapsed = elapsed.Elapsed(spool=spool)
+    try:
+        ctx = multiprocessing.get_context("fork")
+        p = ctx.Process(target=_pool_work, args=(0,))
+        p.start()
+        p.join()
+        assert len(os.listdir(spool)) == 1
+
+        pool = ctx.Pool(3)
+        pool.map(_pool_work, range(30), chunksize=1)
+        pool.close()
+        pool.join()
+    finally:
+        _pool_elapsed._spool = None
+        _pool_elapsed = None
+
+    assert len(os.listdir(spool)) == 4
+    rec = elapsed.Elapsed.collect(spool).result("pool")
+    assert rec and rec.n == 31
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+def test_spool(tmp_path: pathlib.Path) -> None:
+    spool = str(tmp_path / "spool")
+
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_worker, args=(spool, 10 * (i + 1))) for i in range(3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+    assert len(os.listdir(spool)) == 3
+
+    e = elapsed.Elapsed.collect(spool)
+    rec = e.result("worker")
+    assert rec
+    assert rec.n == 60
+    assert e.tree()[0].children[0].n == 60
+
+    # results of the parent are not inherited by forked children
+    parent = elapsed.Elapsed(spool=spool)
+    with parent("parent"):
+        pass
+
+    p = ctx.Process(target=parent.publish, args=(spool, "child.json"))
+    p.start()
+    p.join()
+
+    assert elapsed.Elapsed.collect(spool).result("parent") is None
+
+    parent.publish(spool)
+    assert elapsed.Elapsed.collect(spool).result("parent")
+
+
+def test_snapshot() -> None:
+    e = elapsed.Elapsed()
+    for i in range(100):
+        with e("a"):
+            with e("b"):
+                pass
+
+    e2 = elapsed.Elapsed()
+    e2.merge_snapshot(json.loads(json.dumps(e.snapshot())))
+    e2.merge_snapshot(e.snapshot())
+
+    h1 = e.histogram("b")
+    h2 = e2.histogram("b")
+    assert h1 and h2
+    assert h2.n == 200
+    assert h2.buckets == {k: v * 2 for k, v in h1.buckets.items()}
+    assert e2.tree()[0].exclusive == pytest.approx(e.tree()[0].exclusive * 2)
+
+
+def test_memory() -> None:
+    e = elapsed.Elapsed(memory=True)
+    try:
+        keep = []
+        for i in range(10):
+            with e("alloc"):
+                with e("temp"):
+                    objs = [object() for _ in range(1000)]
+                    del objs
+                keep.append(bytearray(100000))
+
+        with e("gc"):
+            gc.collect()
+    finally:
+        e.stop_memory()
+
+    assert not tracemalloc.is_tracing()
+    assert elapsed._gc_callback not in gc.callbacks
+
+    alloc = e.result("alloc")
+    temp = e.result("temp")
+    gcrec = e.result("gc")
+    assert alloc and temp and gcrec
+    assert alloc.mem_ave is not None and alloc.mem_ave >= 100000
+    assert temp.mem_ave is not None and temp.mem_ave < 10000
+    if hasattr(tracemalloc, "reset_peak"):
+        assert temp.mem_peak is not None and temp.mem_peak > 10000
+        assert alloc.mem_peak is not None and alloc.mem_peak >= temp.mem_peak
+    assert gcrec.gc_n and gcrec.gc_n >= 1
+    assert gcrec.gc_pause is not None and gcrec.gc_pause > 0
+
+    f = StringIO()
+    with redirect_stdout(f):
+        e.print("gc")
+    assert "gc_n:" in f.getvalue()
+
+    plain = elapsed.Elapsed()
+    with plain("a"):
+        pass
+    rec = plain.result("a")
+    assert rec and rec.mem_ave is None
+
+
+def test_stop_memory() -> None:
+    e1 = elapsed.Elapsed(memory=True)
+    e2 = elapsed.Elapsed(memory=True)
+    e1.stop_memory()
+    e1.stop_memory()
+    assert tracemalloc.is_tracing()
+
+    with e1("a"):
+        pass
+    assert e1.result("a").mem_ave is None  # type: ignore
+
+    del e2
+    gc.collect()
+    assert not tracemalloc.is_tracing()
+    assert elapsed._gc_callback not in gc.callbacks
+
+    # tracemalloc started by others is not stopped.
+    tracemalloc.start()
+    try:
+        elapsed.Elapsed(memory=True).stop_memory()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_rolling(monkeypatch: Any) -> None:
+    now = [0]
+    monkeypatch.setattr(elapsed, "_perf_counter_ns", lambda: now[0])
+
+    e = elapsed.Elapsed(window=60, window_buckets=6)
+
+    def run(name: str, duration: int) -> None:
+        with e(name):
+            now[0] += duration
+
+    # one section per second, for 2 minutes
+    for i in range(120):
+        run("a", 1000 * (i + 1))
+        now[0] = (i + 1) * 1000000000
+
+    recs = e.rolling(10)
+    assert len(recs) == 1
+    assert recs[0].n == 10  # sections ended at 110..119 sec
+    assert recs[0].max == 120000 / 1e9
+
+    assert e.rolling(60)[0].n == 60
+    assert e.rolling(25)[0].n == 30
+
+    result = e.result("a")
+    assert result and result.n == 120
+
+    # rings are bounded
+    shard = e._collect()
+    assert [len(r) for r in shard.rings.values()] == [6]
+
+    # no sections for 2 minutes
+    now[0] += 120 * 1000000000
+    assert e.rolling(60) == []
+
+    with pytest.raises(ValueError):
+        e.rolling(61)
+
+    with pytest.raises(ValueError):
+        elapsed.Elapsed().rolling(1)
+
+
+def test_reset() -> None:
+    e = elapsed.Elapsed()
+    stop = threading.Event()
+
+    def run() -> None:
+        while not stop.is_set():
+            with e("thread"):
+                pass
+
+    t = threading.Thread(target=run)
+    t.start()
+    try:
+        snapshots = []
+        for i in range(20):
+            time.sleep(0.001)
+            snapshots.append(e.reset())
+    finally:
+        stop.set()
+        t.join()
+
+    total = sum(r.n for s in snapshots + [e] for r in s.results() if r)
+    assert total > 0
+
+    with e("a"):
+        pass
+    old = e.reset()
+    assert old.result("a")
+    assert e.result("a") is None
+
+
+def test_sample() -> None:
+    e = elapsed.Elapsed(sample=10)
+
+    for i in range(10000):
+        with e("root"):
+            with e("child"):
+                pass
+            e.record("recorded", 1000)
+
+    root = e.result("root")
+    child = e.result("child")
+    recorded = e.result("recorded")
+    assert root and child and recorded
+
+    # 1000 samples on average, stddev is about 30
+    assert 8000 <= root.n <= 12000
+    assert root.n % 10 == 0
+    assert child.n == root.n
+    assert recorded.n == root.n
+
+    node = e.tree()[0]
+    assert node.exclusive < node.inclusive
+    assert e._stack.get() is None
+
+
+def test_disabled() -> None:
+    e = elapsed.Elapsed(enabled=False)
+
+    @e("decorated")
+    def decorated() -> None:
+        pass
+
+    assert e("a") is e("b")
+    with e("a"):
+        e.begin("b")
+        e.end()
+        decorated()
+    assert e.results() == []
+
+    e.enabled = True
+    decorated()
+    with e("a"):
+        pass
+    assert [r.name for r in e.results() if r] == ["a"]
+
+    @e("decorated2")
+    def decorated2() -> None:
+        pass
+
+    elapsed.set_enabled(False)
+    try:
+        with e("c"):
+            decorated2()
+            e.begin("d")
+            e.end()
+        assert e("e") is e("f")
+    finally:
+        elapsed.set_enabled(True)
+
+    # disabled while running
+    with e("running"):
+        elapsed.set_enabled(False)
+    elapsed.set_enabled(True)
+
+    assert [r.name for r in e.results() if r] == ["a", "running"]
+    assert e._stack.get() is None
+
+
+def test_slow(monkeypatch: Any) -> None:
+    now = [0]
+    monkeypatch.setattr(elapsed, "_perf_counter_ns", lambda: now[0])
+
+    e = elapsed.Elapsed(slow=1.0, slow_log=3)
+
+    def run(name: str, duration: float, slow: Optional[float] = None) -> None:
+        with e(name, slow=slow):
+            now[0] += int(duration * 1e9)
+
+    run("fast", 0.5)
+    run("slow", 1.5)
+    run("query", 1.5, slow=2.0)
+    run("query", 2.5)
+
+    e.begin("outer")
+    run("inner", 3)
+    e.end()
+
+    recs = e.slow_sections()
+    assert [r.path for r in recs] == [("query",), ("outer", "inner"), ("outer",)]
+    assert recs[0].duration == 2.5
+    assert recs[0].thread_name == threading.current_thread().name
+    assert recs[0].task is None
+    assert "in run" in recs[0].stack[-1]
+    assert "in test_slow" in recs[0].stack[-2]
+    assert "in test_slow" in recs[2].stack[-1]
+
+    e.set_threshold("query", None)
+    run("query", 1.5)
+    assert e.slow_sections()[-1].name == "query"
+
+    f = StringIO()
+    e.print_slow(f)
+    assert f.getvalue().startswith("outer/inner: 3.00000 at ")
+
+    d = json.loads(e.to_json())
+    assert d["slow"][-1]["path"] == ["query"]
+
+    assert e.reset().slow_sections()[-1].name == "query"
+    assert e.slow_sections() == []
+
+
+def test_slow_disabled() -> None:
+    e = elapsed.Elapsed()
+    with e("a"):
+        pass
+    assert e._thresholds is None
+
+    with e("a", slow=0):
+        pass
+    assert e.slow_sections()[0].name == "a"
+    e.set_threshold("a", None)
+    assert e._thresholds is None
+
+    # Thresholds are replaced only if changed.
+    with e("b", slow=1.0):
+        pass
+    thresholds = e._thresholds
+    with e("b", slow=1.0):
+        pass
+    e.begin("b", slow=1.0)
+    e.end()
+    assert e._thresholds is thresholds
+    with e("b", slow=2.0):
+        pass
+    assert e._thresholds == {"b": 2000000000}
+
+    e = elapsed.Elapsed(enabled=False)
+    with e("a", slow=1.0):
+        pass
+    assert e._thresholds is None
+
+
+def test_thread_exit() -> None:
+    e = elapsed.Elapsed()
+    with e("main"):
+        pass
+
+    def work() -> None:
+        with e("thread"):
+            pass
+
+    for _ in range(10):
+        threads = [threading.Thread(target=work) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    gc.collect()
+
+    # Results of exited threads are merged.
+    rec = e.result("thread")
+    assert rec and rec.n == 200
+    assert len(e._shards) == 2
+
+    # Shards taken by reset() are not merged again.
+    recorded = threading.Event()
+    taken_event = threading.Event()
+
+    def work_reset() -> None:
+        work()
+        recorded.set()
+        taken_event.wait()
+
+    t = threading.Thread(target=work_reset)
+    t.start()
+    recorded.wait()
+    taken = e.reset()
+    taken_event.set()
+    t.join()
+    gc.collect()
+    assert e.result("thread") is None
+    rec = taken.result("thread")
+    assert rec and rec.n == 201
+
+
+def test_extras() -> None:
+    assert not elapsed.Elapsed()._extras
+    assert elapsed.Elapsed(trace=10)._extras
+    assert elapsed.Elapsed(window=60)._extras
+    assert elapsed.Elapsed(slow=1)._extras
+
+    e = elapsed.Elapsed()
+    e.set_threshold("a", 1)
+    assert e._extras
+    e.set_threshold("a", None)
+    assert not e._extras
+
+    e.profile("a")
+    e.unprofile("a")
+    assert e._extras
+
+    m = elapsed.Elapsed(memory=True)
+    assert m._extras
+    m.stop_memory()
+    assert not m._extras
+
+
+def _fib(n: int) -> int:
+    return n if n < 2 else _fib(n - 1) + _fib(n - 2)
+
+
+def _spin(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profile(tmp_path: pathlib.Path) -> None:
+    e = elapsed.Elapsed()
+    e.profile("hot")
+
+    with e("cold"):
+        _fib(10)
+
+    def work() -> None:
+        for _ in range(3):
+            with e("hot"):
+                _fib(10)
+                with e("hot"):  # nested
+                    _fib(5)
+
+    t = threading.Thread(target=work)
+    t.start()
+    t.join()
+    work()
+
+    stats = e.profile_stats("hot")
+    assert stats is not None
+    funcs = {f[2]: st for f, st in stats.stats.items()}  # type: ignore
+    assert funcs["_fib"][1] == 2 * 3 * (177 + 15)  # calls of _fib(10) and _fib(5)
+    assert "work" not in funcs
+
+    assert e.profile_stats("cold") is None
+
+    rec = e.result("hot")
+    assert rec and rec.profile
+    assert rec.profile[0][0].endswith("(_fib)")
+    assert rec.profile[0][1] == 2 * 3 * (177 + 15)
+    assert json.loads(e.to_json())["sections"][1]["profile"][0][0].endswith("(_fib)")
+
+    filename = str(tmp_path / "hot.prof")
+    e.dump_profile("hot", filename)
+    assert pstats_total_calls(filename) == stats.total_calls  # type: ignore
+
+    e.unprofile("hot")
+    with e("hot"):
+        _fib(10)
+    assert e.profile_stats("hot").total_calls == stats.total_calls  # type: ignore
+
+    with pytest.raises(ValueError):
+        e.dump_profile("cold", filename)
+
+
+def pstats_total_calls(filename: str) -> int:
+    import pstats
+
+    return int(pstats.Stats(filename).total_calls)  # type: ignore
+
+
+def test_profile_sampling() -> None:
+    e = elapsed.Elapsed()
+    e.profile("hot", interval=0.001)
+
+    def inner() -> None:
+        _spin(0.2)
+
+    with e("hot"):
+        _spin(0.1)
+        inner()
+    _spin(0.1)
+
+    stats = e.profile_stats("hot")
+    assert stats is not None
+    funcs = {f[2]: st for f, st in stats.stats.items()}  # type: ignore
+    assert "test_profile_sampling" in funcs
+    assert "_spin" in funcs
+    assert funcs["inner"][3] > funcs["_spin"][2] / 3
+    # cumulative time of the section
+    assert 0.1 < funcs["test_profile_sampling"][3] < 0.6
+    assert {f[2] for f in funcs["_spin"][4]} == {"inner", "test_profile_sampling"}
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import io
+import json
+import pickle
+from datetime import date, datetime
+from typing import Any, Dict, List
+
+import pytest
+
+from jashin import jsondecode, jsondefault
+from jashin.dictattr import DictModel, ItemAttr, MappingAttr, SequenceAttr
+
+
+class User(DictModel):
+    name = ItemAttr[str]()
+    age = ItemAttr[int]()
+
+
+class Group(DictModel):
+    title = ItemAttr[str]()
+    members = SequenceAttr(User)
+
+
+class Blob(DictModel):
+    BUFFER_THRESHOLD = 4
+
+    data = ItemAttr[bytes]()
+
+
+def test_roundtrip() -> None:
+    now = datetime.now()
+    data = {
+        "now": now,
+        "today": now.date(),
+        "bytes": b"abc",
+        "set": {1, 2, 3},
+        "list": [1, "a", None],
+    }
+
+    s = json.dumps(data, default=jsondefault.tagged())
+    ret = jsondecode.common().loads(s)
+
+    assert ret == data
+
+
+class Foo:
+    def __init__(self, a: int) -> None:
+        self.a = a
+
+
+def test_register() -> None:
+    repo = jsondefault.tagged()
+
+    @repo.register
+    def conv_foo(obj: Foo) -> Dict[str, Any]:
+        return jsondefault.tag("foo", obj.a)
+
+    decoder = jsondecode.common()
+
+    @decoder.register("foo")
+    def load_foo(value: int) -> Foo:
+        return Foo(value)
+
+    ret = decoder.loads(json.dumps([Foo(1), date(2000, 1, 1)], default=repo))
+    assert isinstance(ret[0], Foo)
+    assert ret[0].a == 1
+    assert ret[1] == date(2000, 1, 1)
+
+    # unknown tags are left as is
+    assert decoder.loads('{"__type__": "bar", "value": 1}') == jsondefault.tag("bar", 1)
+
+
+def test_model() -> None:
+    decoder = jsondecode.Decoder()
+    decoder.register_model(User)
+
+    group = Group({"title": "group", "members": []})
+    group.members.append(User({"name": "user1", "age": 10}))
+
+    s = json.dumps(group, default=jsondefault.tagged())
+    ret = decoder.loads(s)
+
+    # Group has no registration
+    assert isinstance(ret, dict)
+    assert isinstance(ret["members"][0], User)
+    assert ret["members"][0].name == "user1"
+
+    # key set differs
+    assert decoder.loads('{"name": "x"}') == {"name": "x"}
+
+
+def test_model_path() -> None:
+    class Address(DictModel):
+        name = ItemAttr[str]()
+        city = ItemAttr[str](path="location.city")
+        zip = ItemAttr[str](path="location.zip")
+
+    decoder = jsondecode.Decoder()
+    decoder.register_model(Address)
+
+    ret = decoder.loads('{"name": "x", "location": {"city": "Tokyo", "zip": "1"}}')
+    assert isinstance(ret, Address)
+    assert ret.city == "Tokyo"
+
+
+class Child(DictModel):
+    x = ItemAttr[int]()
+
+
+class Parent(DictModel):
+    child = ItemAttr(Child)
+    kids = SequenceAttr(Child)
+    byname = MappingAttr[str, Child](Child)
+    meta = ItemAttr[Dict[str, Any]]()
+
+
+def test_model_nested() -> None:
+    decoder = jsondecode.Decoder()
+    decoder.register_model(Child)
+    decoder.register_model(Parent)
+
+    d = {
+        "child": {"x": 1},
+        "kids": [{"x": 2}, {"x": 3}],
+        "byname": {"a": {"x": 4}},
+        "meta": {"items": [{"x": 5}]},
+    }
+    ret = decoder.loads(json.dumps(Parent(d), default=jsondefault.tagged()))
+    assert isinstance(ret, Parent)
+    assert ret.values == d
+    assert ret.child.x == 1
+    assert [k.x for k in ret.kids] == [2, 3]
+    assert ret.byname["a"].x == 4
+
+    # Models not nested in models are kept.
+    ret = decoder.loads('[{"x": 1}, {"other": {"x": 2}}]')
+    assert isinstance(ret[0], Child)
+    assert isinstance(ret[1]["other"], Child)
+
+
+def test_model_optional() -> None:
+    class Profile(DictModel):
+        name = ItemAttr[str]()
+        age = ItemAttr[int](default=0)
+        email = ItemAttr[str](default=None)
+
+    decoder = jsondecode.Decoder()
+    decoder.register_model(Profile)
+
+    for s in [
+        '{"name": "x"}',
+        '{"name": "x", "age": 1}',
+        '{"name": "x", "email": "e"}',
+        '{"name": "x", "age": 1, "email": "e"}',
+    ]:
+        ret = decoder.loads(s)
+        assert isinstance(ret, Profile)
+        assert ret.name == "x"
+
+    assert decoder.loads('{"age": 1}') == {"age": 1}
+
+    assert decoder.loads('{"name": "x", "other": 1}') == {"name": "x", "other": 1}
+    assert decoder.loads("{}") == {}
+
+    # Registering again is allowed.
+    decoder.register_model(Profile)
+
+    class Many(DictModel):
+        pass
+
+    for i in range(20):
+        setattr(Many, f"f{i}", ItemAttr[int](name=f"f{i}", default=0))
+
+    decoder = jsondecode.Decoder()
+    decoder.register_model(Many)
+    assert isinstance(decoder.loads('{"f3": 1, "f19": 2}'), Many)
+    assert decoder.loads("{}") == {}
+
+
+def test_model_conflict() -> None:
+    class A(DictModel):
+        id = ItemAttr[int]()
+        name = ItemAttr[str](default="")
+
+    class B(DictModel):
+        id = ItemAttr[int]()
+        email = ItemAttr[str](default="")
+
+    class C(DictModel):
+        id = ItemAttr[int]()
+        code = ItemAttr[str]()
+        email = ItemAttr[str](default="")
+
+    decoder = jsondecode.Decoder()
+    decoder.register_model(A)
+    with pytest.raises(ValueError, match="already registered"):
+        decoder.register_model(B)  # {"id"}
+    with pytest.raises(ValueError, match="already registered"):
+        decoder.register_schema(["id", "name"], dict)
+    with pytest.raises(ValueError, match="reserved"):
+        decoder.register_schema(["__type__", "value"], dict)
+
+    decoder.register_model(C)
+    decoder.register_schema(["id", "email"], dict)
+    with pytest.raises(ValueError, match="already registered"):
+        decoder.register_model(B)
+
+    assert isinstance(decoder.loads('{"id": 1}'), A)
+    assert isinstance(decoder.loads('{"id": 1, "code": "c"}'), C)
+    assert isinstance(decoder.loads('{"id": 1, "code": "c", "email": "e"}'), C)
+    assert decoder.loads('{"id": 1, "email": "e"}') == {"id": 1, "email": "e"}
+
+
+def test_iterload() -> None:
+    data: List[Any] = [{"n": i, "d": date(2000, 1, 1 + i % 28)} for i in range(1000)]
+    data.extend([12345, "a string", [], {}, None])
+    s = json.dumps(data, default=jsondefault.tagged(), indent=2)
+
+    decoder = jsondecode.common()
+    for bufsize in (1, 7, 65536):
+        ret = list(decoder.iterload(io.StringIO(s), bufsize=bufsize))
+        assert ret == data
+
+    assert list(decoder.iterload(io.StringIO(" [ ] "))) == []
+    assert list(decoder.iterload(io.StringIO("[1]"), bufsize=1)) == [1]
+
+    # Numbers split at fraction or exponent
+    for bufsize in range(1, 12):
+        s = "[123.45, 6, 1e5,-2.5E-3 ,7]"
+        ret = list(decoder.iterload(io.StringIO(s), bufsize=bufsize))
+        assert ret == [123.45, 6, 1e5, -2.5e-3, 7]
+
+
+def test_memoryview() -> None:
+    buffers: List[Any] = []
+    p = pickle.dumps(
+        Blob({"data": b"abcde"}), protocol=5, buffer_callback=buffers.append
+    )
+    blob = pickle.loads(p, buffers=buffers)
+    assert isinstance(blob.data, memoryview)
+
+    ret = json.loads(json.dumps(blob.values, default=jsondefault.common()))
+    assert ret == {"data": "YWJjZGU="}
+
+    s = json.dumps(blob.values, default=jsondefault.tagged())
+    assert jsondecode.common().loads(s) == {"data": b"abcde"}
+
+    s = json.dumps([bytearray(b"abcde")], default=jsondefault.tagged())
+    assert jsondecode.common().loads(s) == [b"abcde"]
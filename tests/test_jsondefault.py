@@ -3,10 +3,11 @@ from __future__ import annotations
 import json
 from base64 import b64decode
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict
+from datetime import date, datetime
+from typing import Dict, Optional, Set
 
 from jashin import jsondefault
+from jashin.dictattr import DictModel, ItemAttr, MappingAttr, SequenceAttr
 
 
 @dataclass
@@ -44,3 +45,65 @@ def test_common() -> None:
     assert ret["now"] == now.isoformat()
     assert ret["today"] == now.date().isoformat()
     assert b64decode(ret["bytes"]) == b"abc"
+
+
+class Item(DictModel):
+    name = ItemAttr[str]()
+    created = ItemAttr[Optional[datetime]]()
+
+
+class Record(DictModel):
+    id = ItemAttr[int]()
+    created = ItemAttr[datetime]()
+    day = ItemAttr(date.fromisoformat, date.isoformat)
+    token = ItemAttr[bytes]()
+    groups = ItemAttr[Set[int]]()
+    dates = SequenceAttr[date]()
+    items = SequenceAttr(Item)
+    bykey = MappingAttr[str, Item](Item)
+    main = ItemAttr(Item)
+    name = ItemAttr[str](path="main.name")
+
+
+def test_model_serializer() -> None:
+    now = datetime(2020, 1, 2, 3, 4, 5)
+    item = {"name": "item", "created": now}
+    values = {
+        "id": 1,
+        "created": now,
+        "day": "2020-01-01",
+        "token": b"abc",
+        "groups": {1},
+        "dates": [date(2020, 1, 1), "2020-01-02"],
+        "items": [item, None],
+        "bykey": {"a": item},
+        "main": item,
+        "extra": now,
+    }
+    rec = Record(values)
+
+    for repo in (jsondefault.common(), jsondefault.tagged()):
+        serialize = jsondefault.model_serializer(Record, repo)
+        ret = serialize(rec)
+        assert ret is not values
+        assert values["created"] is now
+        assert ret["extra"] is now  # left to default
+        assert json.dumps(ret, default=repo) == json.dumps(values, default=repo)
+
+    ret = jsondefault.model_serializer(Record)(rec)
+    assert ret["created"] == "2020-01-02T03:04:05"
+    assert ret["token"] == "YWJj"
+    assert ret["groups"] == [1]
+    assert ret["dates"] == ["2020-01-01", "2020-01-02"]
+    assert ret["items"] == [{"name": "item", "created": "2020-01-02T03:04:05"}, None]
+    assert ret["bykey"]["a"]["created"] == "2020-01-02T03:04:05"
+    assert ret["main"]["created"] == "2020-01-02T03:04:05"
+
+    # Nothing to convert
+    values = {"name": "item"}
+    assert jsondefault.model_serializer(Plain)(Plain(values)) is values
+
+
+class Plain(DictModel):
+    name = ItemAttr[str]()
+    data = MappingAttr[str, int]()
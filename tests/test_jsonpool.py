@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import concurrent.futures
+import io
+import json
+from datetime import date
+from typing import Any, Dict, List
+
+import pytest
+
+from jashin import jsondefault, jsonpool
+
+
+def records(n: int) -> List[Dict[str, Any]]:
+    return [{"id": i, "date": date(2000, 1, 1 + i % 28), "tags": {i}} for i in range(n)]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"indent": 2},
+        {"separators": (",", ":")},
+        {"sort_keys": True, "indent": None},
+    ],
+)
+def test_dumps(kwargs: Dict[str, Any]) -> None:
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        for n in (0, 1, 7, 10, 33):
+            data = records(n)
+            expected = json.dumps(data, default=jsondefault.common(), **kwargs)
+            ret = jsonpool.dumps(
+                data, jsondefault.common, chunksize=5, executor=executor, **kwargs
+            )
+            assert ret == expected.encode("utf-8")
+
+
+def test_process() -> None:
+    data = records(100)
+    expected = json.dumps(data, default=jsondefault.common()).encode("utf-8")
+
+    assert (
+        jsonpool.dumps(data, jsondefault.common, chunksize=30, processes=2) == expected
+    )
+
+    f = io.BytesIO()
+    jsonpool.dump(data, f, jsondefault.common, chunksize=30, processes=2)
+    assert f.getvalue() == expected